@@ -1,59 +1,81 @@
 import httpx
 from src.api.core.config import settings
+from src.api.core.rate_limiter import UpstreamRateLimiter, RateLimitExceeded, upstream_priority
+from src.api.core.circuit_breaker import CircuitBreaker
+from src.api.core.metrics import timed, UPSTREAM_RESPONSES
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+def create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        settings.http_read_timeout,
+        connect=settings.http_connect_timeout,
+        pool=settings.http_pool_timeout,
+    )
+    return httpx.AsyncClient(http2=settings.http2_enabled, limits=limits, timeout=timeout)
+
 class OpenWeatherMapClient:
-    def __init__(self):
+    def __init__(self, http_client: httpx.AsyncClient, rate_limiter: Optional[UpstreamRateLimiter] = None, circuit_breaker: Optional[CircuitBreaker] = None):
         self.api_key = settings.openweathermap_api_key
-        self.base_url = "https://api.openweathermap.org/data/2.5/weather"
+        self.base_url = settings.openweathermap_base_url.rstrip("/")
+        self.http_client = http_client
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    async def _get(self, url: str, endpoint: str) -> httpx.Response:
+        self.circuit_breaker.before_call()
+        if self.rate_limiter is not None:
+            with timed("rate_limit_wait"):
+                await self.rate_limiter.acquire(upstream_priority.get())
+        try:
+            with timed(f"upstream_{endpoint}"):
+                response = await self.http_client.get(url)
+        except httpx.RequestError:
+            UPSTREAM_RESPONSES.labels(endpoint, "error").inc()
+            self.circuit_breaker.record_failure()
+            raise
+        UPSTREAM_RESPONSES.labels(endpoint, str(response.status_code)).inc()
+        if response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        if response.status_code == 429:
+            raise RateLimitExceeded(float(response.headers.get("Retry-After", 60)))
+        response.raise_for_status()
+        return response
 
-    async def get_current_weather(self, city: str, units: str = "metric"):
+    async def get_onecall(self, lat: float, lon: float, units: str = "metric"):
+        url = f"{self.base_url}/data/3.0/onecall?lat={lat}&lon={lon}&appid={self.api_key}&units={units}&exclude=minutely,daily"
         try:
-            lat, lon = await self.get_coordinates(city)
-            url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&appid={self.api_key}&units={units}&exclude=minutely,daily"
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                return response.json()
-        except ValueError as e:
-            logger.exception(f"ValueError: {e}")
-            raise ValueError(str(e))
+            response = await self._get(url, "onecall")
+            return response.json()
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 logger.exception(f"HTTPStatusError: {e}")
-                raise ValueError("City not found")
+                raise ValueError("Location not found")
             raise
         except httpx.RequestError as e:
             logger.exception(f"RequestError: {e}")
             raise Exception("Could not connect to OpenWeatherMap API")
 
-    async def get_weather_by_coordinates(self, lat: float, lon: float, units: str = "metric"):
+    async def get_location_name(self, lat: float, lon: float):
+        url = f"{self.base_url}/geo/1.0/reverse?lat={lat}&lon={lon}&limit=1&appid={self.api_key}&lang=en"
         try:
-            url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&appid={self.api_key}&units={units}&exclude=minutely,daily"
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                
-                reverse_geo_url = f"http://api.openweathermap.org/geo/1.0/reverse?lat={lat}&lon={lon}&limit=1&appid={self.api_key}&lang=en"
-                rev_response = await client.get(reverse_geo_url)
-                rev_response.raise_for_status()
-                rev_data = rev_response.json()
-                
-                
-                weather_data = response.json()
-                
-                
-                if rev_data and len(rev_data) > 0:
-                    name = rev_data[0].get("name", "")
-                    
-                    if name:
-                        name = name.encode('ascii', 'replace').decode('ascii')
-                        weather_data["name"] = name
-                
-                return weather_data
+            response = await self._get(url, "reverse_geocode")
+            data = response.json()
+            if not data:
+                return None
+            name = data[0].get("name", "")
+            if not name:
+                return None
+            return name.encode('ascii', 'replace').decode('ascii')
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 logger.exception(f"HTTPStatusError: {e}")
@@ -64,20 +86,18 @@ class OpenWeatherMapClient:
             raise Exception("Could not connect to OpenWeatherMap API")
 
     async def get_coordinates(self, city: str):
-        url = f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={self.api_key}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                if not data:
-                    raise ValueError("City not found")
-                return data[0]["lat"], data[0]["lon"]
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    logger.exception(f"HTTPStatusError: {e}")
-                    raise ValueError("City not found")
-                raise
-            except httpx.RequestError as e:
-                logger.exception(f"RequestError: {e}")
-                raise Exception("Could not connect to OpenWeatherMap API")
+        url = f"{self.base_url}/geo/1.0/direct?q={city}&limit=1&appid={self.api_key}"
+        try:
+            response = await self._get(url, "geocode")
+            data = response.json()
+            if not data:
+                raise ValueError("City not found")
+            return data[0]["lat"], data[0]["lon"]
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.exception(f"HTTPStatusError: {e}")
+                raise ValueError("City not found")
+            raise
+        except httpx.RequestError as e:
+            logger.exception(f"RequestError: {e}")
+            raise Exception("Could not connect to OpenWeatherMap API")
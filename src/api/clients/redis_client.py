@@ -1,38 +1,399 @@
 import redis.asyncio as redis
+import asyncio
 import json
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 from src.api.core.config import settings
+from src.api.core.lru import LRUCache
+from src.api.core.forecast_columns import ColumnarForecast, encode_hourly_forecast, decode_hourly_forecast
+from src.api.core.forecast_summary import SUMMARY_UNITS, summarize_forecast
+from src.api.core.responses import CachedPayload, dumps, prepare_response
+from src.api.core.compression import UnsupportedCompression, compress_value, decompress_value, is_gzip
+from src.api.core.metrics import timed, record_cache_lookup
 
-class RedisClient:
-    def __init__(self):
-        self.redis = redis.Redis(host=settings.redis_host, port=settings.redis_port, decode_responses=True)
+logger = logging.getLogger(__name__)
 
-    async def get_weather(self, key: str, units: str = "metric"):
-        cache_key = f"weather:{key}:{units}"
-        data = await self.redis.get(cache_key)
-        if data:
-            return json.loads(data)
+INVALIDATION_CHANNEL = "cache:invalidate"
+FORECAST_READY_CHANNEL = "forecast:ready"
+LOCATION_INDEX_KEY = "geo:weather_cells"
+HOT_KEYS_KEY = "hotkeys"
+WEATHER_TTL = 900
+FORECAST_TTL = 1800
+FORECAST_PENDING_TTL = 60
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stale: bool
+
+class WeatherRead(NamedTuple):
+    entry: Optional[CacheEntry]
+    claimed_forecast: bool
+
+def create_local_cache() -> Optional[LRUCache]:
+    if not settings.local_cache_enabled:
         return None
+    return LRUCache(settings.local_cache_max_entries, settings.local_cache_max_ttl, settings.local_cache_max_bytes)
+
+def create_redis_pool() -> redis.ConnectionPool:
+    return redis.BlockingConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_connect_timeout,
+        decode_responses=False,
+    )
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# One round trip for the weather hit path: read the entry, check whether its
+# forecast exists and atomically claim the pending flag if it does not.
+READ_WEATHER_SCRIPT = """
+local weather = redis.call('get', KEYS[1])
+if not weather then
+    return {-2, -2, 0}
+end
+local weather_ttl = redis.call('pttl', KEYS[1])
+local forecast_ttl = redis.call('pttl', KEYS[2])
+local claimed = 0
+if forecast_ttl == -2 and weather_ttl > tonumber(ARGV[2]) then
+    if redis.call('set', KEYS[3], '1', 'EX', ARGV[1], 'NX') then
+        claimed = 1
+    end
+end
+return {weather_ttl, forecast_ttl, claimed, weather}
+"""
+
+def load_weather(data: bytes) -> CachedPayload:
+    return CachedPayload(decompress_value(data), gzip_body=data if is_gzip(data) else None)
+
+def load_hourly_forecast(data: bytes) -> ColumnarForecast:
+    return decode_hourly_forecast(decompress_value(data))
+
+class RedisClient:
+    def __init__(self, connection_pool: Optional[redis.ConnectionPool] = None, local_cache: Optional[LRUCache] = None):
+        self.redis = redis.Redis(connection_pool=connection_pool or create_redis_pool())
+        self._release_lock = self.redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._read_weather = self.redis.register_script(READ_WEATHER_SCRIPT)
+        self.local_cache = local_cache
+        self.instance_id = uuid.uuid4().hex
+        self.stats = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0}
+
+    async def get_weather(self, key: str):
+        entry = await self.get_weather_entry(key)
+        return entry.value.value if entry else None
+
+    async def get_weather_entry(self, key: str) -> Optional[CacheEntry]:
+        return (await self._get_many([f"weather:{key}"], load_weather))[0]
+
+    async def get_weather_entries(self, keys: List[str]) -> List[Optional[CacheEntry]]:
+        return await self._get_many([f"weather:{key}" for key in keys], load_weather)
+
+    async def set_weather(self, key: str, value: dict, forecast_pending: bool = False):
+        await self._set_many([self._weather_item(key, value)], [key] if forecast_pending else [])
+
+    async def read_weather(self, key: str) -> WeatherRead:
+        weather_key, forecast_key = f"weather:{key}", f"forecast:{key}"
+        now = time.monotonic()
+        entry = self._local_entry(weather_key, now)
+        if entry is not None and (entry.stale or self.local_cache.get(forecast_key) is not None):
+            return WeatherRead(entry, False)
+
+        with timed("redis_read"):
+            reply = await self._read_weather(keys=[weather_key, forecast_key, f"forecast_pending:{key}"], args=[FORECAST_PENDING_TTL, settings.cache_stale_window * 1000])
+        weather_ttl, _, claimed = reply[:3]
+        if entry is None:
+            entry = self._remote_entry(weather_key, reply[3] if len(reply) > 3 else None, weather_ttl, load_weather, now)
+        return WeatherRead(entry, bool(claimed))
+
+    async def read_forecast(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        return await self._read_with_pending(f"forecast:{key}", key, load_hourly_forecast)
+
+    async def read_forecast_body(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        return await self._read_with_pending(f"forecast_body:{key}", key, load_weather)
+
+    async def read_forecast_summary(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        return await self._read_with_pending(f"forecast_summary:{key}", key, load_weather)
+
+    async def _read_with_pending(self, cache_key: str, key: str, decode: Callable[[bytes], Any]) -> Tuple[Optional[CacheEntry], bool]:
+        now = time.monotonic()
+        entry = self._local_entry(cache_key, now)
+        with timed("redis_read"):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.exists(f"forecast_pending:{key}")
+                if entry is None:
+                    pipe.get(cache_key)
+                    pipe.pttl(cache_key)
+                replies = await pipe.execute()
+        pending = bool(replies[0])
+        record_cache_lookup("forecast_pending", "hit" if pending else "miss")
+        if entry is None:
+            entry = self._remote_entry(cache_key, replies[1], replies[2], decode, now)
+        return entry, pending
+
+    async def get_hourly_forecast(self, key: str) -> Optional[ColumnarForecast]:
+        entry = await self.get_hourly_forecast_entry(key)
+        return entry.value if entry else None
+
+    async def get_hourly_forecast_entry(self, key: str) -> Optional[CacheEntry]:
+        return (await self._get_many([f"forecast:{key}"], load_hourly_forecast))[0]
+
+    async def get_hourly_forecast_entries(self, keys: List[str]) -> List[Optional[CacheEntry]]:
+        return await self._get_many([f"forecast:{key}" for key in keys], load_hourly_forecast)
+
+    async def set_hourly_forecast(self, key: str, hourly: List[dict], timezone_offset: int = 0):
+        await self._set_many(self._forecast_items(key, hourly, timezone_offset))
+
+    async def set_weather_and_forecast_many(self, weather: Dict[str, dict], forecasts: Dict[str, List[dict]], timezone_offsets: Optional[Dict[str, int]] = None):
+        timezone_offsets = timezone_offsets or {}
+        items = [self._weather_item(key, value) for key, value in weather.items()]
+        for key, hourly in forecasts.items():
+            items += self._forecast_items(key, hourly, timezone_offsets.get(key, 0))
+        await self._set_many(items)
+
+    def _weather_item(self, key: str, value: dict):
+        body = dumps(value)
+        data = compress_value(body)
+        return f"weather:{key}", CachedPayload(body, value, data if is_gzip(data) else None), data, WEATHER_TTL
 
-    async def set_weather(self, key: str, value: dict, units: str = "metric"):
-        cache_key = f"weather:{key}:{units}"
-        await self.redis.setex(cache_key, 900, json.dumps(value))  
+    def _forecast_items(self, key: str, hourly: List[dict], timezone_offset: int):
+        blob = encode_hourly_forecast(hourly, timezone_offset)
+        forecast = decode_hourly_forecast(blob)
+        response = prepare_response(forecast.to_response("metric"))
+        response_data = compress_value(response.body)
+        response_payload = CachedPayload(response.body, gzip_body=response_data if is_gzip(response_data) else None)
+        forecast.responses["metric"] = response_payload.prepared
 
-    async def get_hourly_forecast(self, key: str, units: str = "metric"):
-        cache_key = f"forecast:{key}:{units}"
-        data = await self.redis.get(cache_key)
+        # derived entries go first so they are in place before forecast:ready is published
+        with timed("summarize"):
+            summary = {units: summarize_forecast(forecast, settings.forecast_summary_window, units) for units in SUMMARY_UNITS}
+        body = dumps(summary)
+        data = compress_value(body)
+        return [
+            (f"forecast_summary:{key}", CachedPayload(body, summary, data if is_gzip(data) else None), data, FORECAST_TTL),
+            (f"forecast_body:{key}", response_payload, response_data, FORECAST_TTL),
+            (f"forecast:{key}", forecast, compress_value(blob), FORECAST_TTL),
+        ]
+
+    def _local_entry(self, cache_key: str, now: float) -> Optional[CacheEntry]:
+        if self.local_cache is None:
+            return None
+        cached = self.local_cache.get(cache_key)
+        if cached is None:
+            self.stats["l1_misses"] += 1
+            return None
+        self.stats["l1_hits"] += 1
+        value, fresh_until = cached
+        # responses memoized on the value since it was cached count against the byte budget
+        self.local_cache.resize(cache_key, value.size)
+        entry = CacheEntry(value, now >= fresh_until)
+        record_cache_lookup(cache_key.partition(":")[0], "stale" if entry.stale else "hit")
+        return entry
+
+    def _remote_entry(self, cache_key: str, data: Optional[bytes], ttl_ms: int, decode: Callable[[bytes], Any], now: float) -> Optional[CacheEntry]:
+        family = cache_key.partition(":")[0]
+        value = None
         if data:
+            try:
+                value = decode(data)
+            except UnsupportedCompression as e:
+                logger.warning(f"Treating {cache_key} as a cache miss: {e}")
+        if value is None:
+            self.stats["l2_misses"] += 1
+            record_cache_lookup(family, "miss")
+            return None
+        self.stats["l2_hits"] += 1
+        fresh_ms = ttl_ms - settings.cache_stale_window * 1000
+        entry = CacheEntry(value, fresh_ms <= 0)
+        record_cache_lookup(family, "stale" if entry.stale else "hit")
+        if self.local_cache is not None and ttl_ms > 0:
+            self.local_cache.set(cache_key, (value, now + fresh_ms / 1000), min(ttl_ms / 1000, settings.local_cache_max_ttl), value.size)
+        return entry
+
+    async def _get_many(self, cache_keys: List[str], decode: Callable[[bytes], Any]) -> List[Optional[CacheEntry]]:
+        now = time.monotonic()
+        entries = [self._local_entry(cache_key, now) for cache_key in cache_keys]
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        if not missing:
+            return entries
+
+        missing_keys = [cache_keys[i] for i in missing]
+        with timed("redis_read"):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.mget(missing_keys)
+                for cache_key in missing_keys:
+                    pipe.pttl(cache_key)
+                replies = await pipe.execute()
+        datas, ttls = replies[0], replies[1:]
+
+        for i, data, ttl_ms in zip(missing, datas, ttls):
+            entries[i] = self._remote_entry(cache_keys[i], data, ttl_ms, decode, now)
+        return entries
+
+    async def _set_many(self, items: List[Tuple[str, Any, bytes, int]], pending_keys: List[str] = ()):
+        if not items:
+            return
+        with timed("redis_write"):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for cache_key, _, data, ttl in items:
+                    pipe.set(cache_key, data, ex=ttl + settings.cache_stale_window)
+                    if self.local_cache is not None:
+                        pipe.publish(INVALIDATION_CHANNEL, f"{self.instance_id}:{cache_key}")
+                    family, _, key = cache_key.partition(":")
+                    if family == "forecast":
+                        pipe.delete(f"forecast_pending:{key}")
+                        pipe.publish(FORECAST_READY_CHANNEL, key)
+                for key in pending_keys:
+                    pipe.set(f"forecast_pending:{key}", "1", ex=FORECAST_PENDING_TTL)
+                await pipe.execute()
+        if self.local_cache is not None:
+            now = time.monotonic()
+            for cache_key, value, data, ttl in items:
+                self.local_cache.set(cache_key, (value, now + ttl), min(ttl + settings.cache_stale_window, settings.local_cache_max_ttl), value.size)
+
+    async def listen_for_invalidations(self):
+        def invalidate(data: str):
+            origin, _, cache_key = data.partition(":")
+            if origin != self.instance_id:
+                self.local_cache.pop(cache_key)
+
+        await self._listen(INVALIDATION_CHANNEL, invalidate, self.local_cache.clear)
+
+    async def listen_for_forecasts(self, on_ready: Callable[[str], None], on_subscribe: Optional[Callable[[], None]] = None):
+        await self._listen(FORECAST_READY_CHANNEL, on_ready, on_subscribe)
+
+    async def _listen(self, channel: str, handle: Callable[[str], None], on_subscribe: Optional[Callable[[], None]] = None):
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(channel)
+                if on_subscribe is not None:
+                    on_subscribe()
+                async for message in pubsub.listen():
+                    handle(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Listener for {channel} failed, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        if self.local_cache is not None:
+            stats["l1_entries"] = len(self.local_cache)
+            stats["l1_bytes"] = self.local_cache.current_bytes
+        return stats
+
+    async def set_forecast_pending(self, key: str):
+        await self.redis.set(f"forecast_pending:{key}", "1", ex=FORECAST_PENDING_TTL)
+
+    async def is_forecast_pending(self, key: str):
+        with timed("redis_read"):
+            pending = await self.redis.exists(f"forecast_pending:{key}")
+        record_cache_lookup("forecast_pending", "hit" if pending else "miss")
+        return pending
+
+    async def clear_forecast_pending(self, key: str):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(f"forecast_pending:{key}")
+            pipe.publish(FORECAST_READY_CHANNEL, key)
+            await pipe.execute()
+
+    async def increment_hot_keys(self, counts: Dict[str, int]):
+        if not counts:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for member, count in counts.items():
+                pipe.zincrby(HOT_KEYS_KEY, count, member)
+            await pipe.execute()
+
+    async def decay_hot_keys(self, factor: float, min_score: float):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(HOT_KEYS_KEY, {HOT_KEYS_KEY: factor})
+            pipe.zremrangebyscore(HOT_KEYS_KEY, "-inf", f"({min_score}")
+            await pipe.execute()
+
+    async def remove_hot_key(self, member: str):
+        await self.redis.zrem(HOT_KEYS_KEY, member)
+
+    async def get_hot_keys(self, count: int) -> List[str]:
+        members = await self.redis.zrevrange(HOT_KEYS_KEY, 0, count - 1)
+        return [member.decode() for member in members]
+
+    async def get_weather_ttls(self, keys: List[str]) -> List[int]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.pttl(f"weather:{key}")
+            return await pipe.execute()
+
+    async def index_location(self, key: str, lat: float, lon: float):
+        await self.redis.geoadd(LOCATION_INDEX_KEY, (lon, lat, key))
+
+    async def find_fresh_nearby_location(self, lat: float, lon: float, radius_km: float, max_age: int) -> Optional[str]:
+        members = await self.redis.geosearch(LOCATION_INDEX_KEY, longitude=lon, latitude=lat, radius=radius_km, unit="km", sort="ASC", count=5)
+        members = [member.decode() for member in members]
+        if not members:
+            return None
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.pttl(f"weather:{member}")
+            ttls = await pipe.execute()
+
+        expired = [member for member, ttl_ms in zip(members, ttls) if ttl_ms < 0]
+        if expired:
+            await self.redis.zrem(LOCATION_INDEX_KEY, *expired)
+
+        min_ttl_ms = (WEATHER_TTL + settings.cache_stale_window - max_age) * 1000
+        for member, ttl_ms in zip(members, ttls):
+            if ttl_ms > min_ttl_ms:
+                return member
+        return None
+
+    async def get_geocode(self, key: str):
+        data = await self.redis.get(f"geocode:{key}")
+        if data is not None:
             return json.loads(data)
         return None
 
-    async def set_hourly_forecast(self, key: str, value: dict, units: str = "metric"):
-        cache_key = f"forecast:{key}:{units}"
-        await self.redis.setex(cache_key, 1800, json.dumps(value))  
+    async def set_geocode(self, key: str, value, ttl: int):
+        await self.redis.set(f"geocode:{key}", json.dumps(value), ex=ttl)
+
+    async def get_geocode_many(self, keys: List[str]) -> List[Any]:
+        if not keys:
+            return []
+        datas = await self.redis.mget([f"geocode:{key}" for key in keys])
+        return [None if data is None else json.loads(data) for data in datas]
+
+    async def set_geocode_many(self, entries: Dict[str, Tuple[Any, int]]):
+        if not entries:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, (value, ttl) in entries.items():
+                pipe.set(f"geocode:{key}", json.dumps(value), ex=ttl)
+            await pipe.execute()
+
+    async def acquire_lock(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await self.redis.set(name, token, px=int(ttl * 1000), nx=True):
+            return token
+        return None
 
-    async def set_forecast_pending(self, key: str, units: str = "metric"):
-        await self.redis.setex(f"forecast_pending:{key}:{units}", 60, "1")  
+    async def release_lock(self, name: str, token: str):
+        await self._release_lock(keys=[name], args=[token])
 
-    async def is_forecast_pending(self, key: str, units: str = "metric"):
-        return await self.redis.exists(f"forecast_pending:{key}:{units}")
+    async def lock_exists(self, name: str) -> bool:
+        return bool(await self.redis.exists(name))
 
     async def close(self):
-        await self.redis.close()
\ No newline at end of file
+        await self.redis.aclose()
+        await self.redis.connection_pool.disconnect()
@@ -0,0 +1,53 @@
+import logging
+import time
+from typing import Optional
+from src.api.core.config import settings
+from src.api.core.errors import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(UpstreamUnavailable):
+    def __init__(self, retry_after: float):
+        super().__init__("OpenWeatherMap is unavailable, try again later", retry_after)
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or settings.circuit_failure_threshold
+        self.reset_timeout = reset_timeout or settings.circuit_reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = None
+
+    def before_call(self):
+        if self.state == CLOSED:
+            return
+        now = time.monotonic()
+        remaining = self.opened_at + self.reset_timeout - now
+        if self.state == OPEN and remaining <= 0:
+            self.state = HALF_OPEN
+            self.probe_started_at = None
+        if self.state == HALF_OPEN and (self.probe_started_at is None or now - self.probe_started_at > self.reset_timeout):
+            self.probe_started_at = now
+            return
+        raise CircuitOpenError(max(remaining, 1.0))
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info("Circuit closed, OpenWeatherMap recovered")
+        self.state = CLOSED
+        self.failures = 0
+        self.probe_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(f"Circuit opened after {self.failures} consecutive OpenWeatherMap failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.probe_started_at = None
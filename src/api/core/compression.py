@@ -0,0 +1,73 @@
+import gzip
+import logging
+import zlib
+from typing import Collection, Optional, Tuple
+from src.api.core.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+BROTLI_QUALITY = 9
+
+class UnsupportedCompression(Exception):
+    pass
+
+if settings.cache_compression == "zstd" and zstandard is None:
+    logger.warning("zstandard is not installed, cache values will be compressed with zlib")
+
+def gzip_compress(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def is_gzip(data: bytes) -> bool:
+    return data[:2] == GZIP_MAGIC
+
+def compress_value(data: bytes) -> bytes:
+    if settings.cache_compression == "none" or len(data) < settings.cache_compression_min_size:
+        return data
+    if settings.cache_compression == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip_compress(data)
+
+def decompress_value(data: bytes) -> bytes:
+    if is_gzip(data):
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise UnsupportedCompression("Cache value is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+def response_encodings(body: bytes) -> Tuple[str, ...]:
+    if len(body) < settings.response_compression_min_size:
+        return ()
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def compress_response(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip_compress(body)
+
+def choose_encoding(accept_encoding: Optional[str], encodings: Collection[str]) -> Optional[str]:
+    if not accept_encoding or not encodings:
+        return None
+    accepted = set()
+    for token in accept_encoding.split(","):
+        coding, _, params = token.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in encodings and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
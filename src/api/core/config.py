@@ -1,11 +1,115 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 import os
 
 class Settings(BaseSettings):
     openweathermap_api_key: str = os.getenv("OPENWEATHERMAP_API_KEY", "")
+    openweathermap_base_url: str = os.getenv("OPENWEATHERMAP_BASE_URL", "https://api.openweathermap.org")
     redis_host: str = os.getenv("REDIS_HOST", "redis")
     redis_port: int = int(os.getenv("REDIS_PORT", 6379))
 
+    # Shared Redis connection pool
+    redis_max_connections: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    redis_pool_timeout: float = float(os.getenv("REDIS_POOL_TIMEOUT", 5.0))
+    redis_socket_timeout: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 2.0))
+    redis_socket_connect_timeout: float = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 2.0))
+
+    # Shared upstream HTTP client
+    http2_enabled: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+    http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0))
+    http_connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.0))
+    http_read_timeout: float = float(os.getenv("HTTP_READ_TIMEOUT", 5.0))
+    http_pool_timeout: float = float(os.getenv("HTTP_POOL_TIMEOUT", 5.0))
+
+    # Geocoding cache (city -> coordinates, coordinates -> place name)
+    geocode_ttl: int = int(os.getenv("GEOCODE_TTL", 30 * 24 * 3600))
+    geocode_negative_ttl: int = int(os.getenv("GEOCODE_NEGATIVE_TTL", 3600))
+    geocode_local_cache_size: int = int(os.getenv("GEOCODE_LOCAL_CACHE_SIZE", 10000))
+    geocode_local_cache_ttl: int = int(os.getenv("GEOCODE_LOCAL_CACHE_TTL", 3600))
+
+    # Request coalescing for cache misses
+    coalesce_lock_ttl: float = float(os.getenv("COALESCE_LOCK_TTL", 10.0))
+    coalesce_wait_timeout: float = float(os.getenv("COALESCE_WAIT_TIMEOUT", 10.0))
+    coalesce_poll_interval: float = float(os.getenv("COALESCE_POLL_INTERVAL", 0.05))
+
+    # In-process L1 cache in front of Redis
+    local_cache_enabled: bool = os.getenv("LOCAL_CACHE_ENABLED", "true").lower() == "true"
+    local_cache_max_entries: int = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 5000))
+    local_cache_max_bytes: int = int(os.getenv("LOCAL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    local_cache_max_ttl: float = float(os.getenv("LOCAL_CACHE_MAX_TTL", 60.0))
+
+    # Spatial quantization of weather-by-location keys ("geohash", "grid" or "exact")
+    location_key_mode: str = os.getenv("LOCATION_KEY_MODE", "geohash")
+    geohash_precision: int = int(os.getenv("GEOHASH_PRECISION", 6))
+    location_grid_km: float = float(os.getenv("LOCATION_GRID_KM", 1.0))
+    nearest_cell_radius_km: float = float(os.getenv("NEAREST_CELL_RADIUS_KM", 0))
+    nearest_cell_max_age: int = int(os.getenv("NEAREST_CELL_MAX_AGE", 600))
+
+    # Batch endpoints
+    batch_max_locations: int = int(os.getenv("BATCH_MAX_LOCATIONS", 100))
+    batch_concurrency: int = int(os.getenv("BATCH_CONCURRENCY", 10))
+
+    # Hot-key tracking and refresh-ahead
+    refresh_ahead_enabled: bool = os.getenv("REFRESH_AHEAD_ENABLED", "true").lower() == "true"
+    refresh_ahead_interval: float = float(os.getenv("REFRESH_AHEAD_INTERVAL", 30.0))
+    refresh_ahead_window: int = int(os.getenv("REFRESH_AHEAD_WINDOW", 120))
+    refresh_ahead_top_k: int = int(os.getenv("REFRESH_AHEAD_TOP_K", 50))
+    refresh_ahead_concurrency: int = int(os.getenv("REFRESH_AHEAD_CONCURRENCY", 5))
+    hot_key_half_life: int = int(os.getenv("HOT_KEY_HALF_LIFE", 3600))
+    hot_key_min_score: float = float(os.getenv("HOT_KEY_MIN_SCORE", 0.5))
+
+    # Cluster-wide OpenWeatherMap rate limit (0 disables a bucket)
+    owm_rate_limit_per_minute: int = int(os.getenv("OWM_RATE_LIMIT_PER_MINUTE", 60))
+    owm_rate_limit_per_day: int = int(os.getenv("OWM_RATE_LIMIT_PER_DAY", 0))
+    rate_limit_background_reserve: float = float(os.getenv("RATE_LIMIT_BACKGROUND_RESERVE", 0.2))
+    rate_limit_foreground_max_wait: float = float(os.getenv("RATE_LIMIT_FOREGROUND_MAX_WAIT", 2.0))
+    rate_limit_background_max_wait: float = float(os.getenv("RATE_LIMIT_BACKGROUND_MAX_WAIT", 30.0))
+
+    # Stale-while-revalidate and upstream circuit breaker
+    cache_stale_window: int = int(os.getenv("CACHE_STALE_WINDOW", 3600))
+    circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    circuit_reset_timeout: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30.0))
+
+    # Forecast push delivery
+    forecast_wait_max: float = float(os.getenv("FORECAST_WAIT_MAX", 30.0))
+    forecast_stream_keepalive: float = float(os.getenv("FORECAST_STREAM_KEEPALIVE", 15.0))
+
+    # Compression of cached values and HTTP responses
+    cache_compression: str = os.getenv("CACHE_COMPRESSION", "zlib")
+    cache_compression_min_size: int = int(os.getenv("CACHE_COMPRESSION_MIN_SIZE", 1024))
+    response_compression_min_size: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 500))
+
+    # Per-day and per-window forecast summaries
+    forecast_summary_window: int = int(os.getenv("FORECAST_SUMMARY_WINDOW", 6))
+
+    # Cache warm-up ("London;Paris;40.71,-74.01", plus one entry per line in WARMUP_FILE)
+    warmup_enabled: bool = os.getenv("WARMUP_ENABLED", "false").lower() == "true"
+    warmup_locations: str = os.getenv("WARMUP_LOCATIONS", "")
+    warmup_file: str = os.getenv("WARMUP_FILE", "")
+    warmup_interval: float = float(os.getenv("WARMUP_INTERVAL", 0))
+    warmup_concurrency: int = int(os.getenv("WARMUP_CONCURRENCY", 5))
+    warmup_batch_size: int = int(os.getenv("WARMUP_BATCH_SIZE", 50))
+
+    # Observability
+    server_timing_enabled: bool = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+
+    @field_validator("geohash_precision")
+    @classmethod
+    def check_geohash_precision(cls, value: int) -> int:
+        if not 1 <= value <= 12:
+            raise ValueError("GEOHASH_PRECISION must be between 1 and 12")
+        return value
+
+    @field_validator("location_grid_km")
+    @classmethod
+    def check_location_grid_km(cls, value: float) -> float:
+        # the cell size is written into grid keys with :g, so it has to survive that round trip
+        if not 0.01 <= value <= 1000 or float(f"{value:g}") != value:
+            raise ValueError("LOCATION_GRID_KM must be between 0.01 and 1000 with at most 6 significant digits")
+        return value
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
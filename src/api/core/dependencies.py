@@ -0,0 +1,36 @@
+from fastapi import Request
+from src.api.clients.openweathermap_client import OpenWeatherMapClient
+from src.api.clients.redis_client import RedisClient
+from src.api.services.geocoding_service import GeocodingService
+from src.api.core.singleflight import RequestCoalescer
+from src.api.core.hotkeys import AccessTracker
+from src.api.core.rate_limiter import UpstreamRateLimiter
+from src.api.core.circuit_breaker import CircuitBreaker
+from src.api.core.forecast_notifier import ForecastNotifier
+
+def get_openweathermap_client(request: Request) -> OpenWeatherMapClient:
+    return request.app.state.openweathermap_client
+
+def get_redis_client(request: Request) -> RedisClient:
+    return request.app.state.redis_client
+
+def get_geocoding_service(request: Request) -> GeocodingService:
+    return request.app.state.geocoding_service
+
+def get_request_coalescer(request: Request) -> RequestCoalescer:
+    return request.app.state.request_coalescer
+
+def get_access_tracker(request: Request) -> AccessTracker:
+    return request.app.state.access_tracker
+
+def get_rate_limiter(request: Request) -> UpstreamRateLimiter:
+    return request.app.state.rate_limiter
+
+def get_circuit_breaker(request: Request) -> CircuitBreaker:
+    return request.app.state.circuit_breaker
+
+def get_forecast_notifier(request: Request) -> ForecastNotifier:
+    return request.app.state.forecast_notifier
+
+def get_cache_warmer(request: Request):
+    return getattr(request.app.state, "cache_warmer", None)
@@ -0,0 +1,4 @@
+class UpstreamUnavailable(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,145 @@
+import json
+import struct
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+import numpy as np
+
+MAGIC = b"HFC2"
+LEGACY_MAGIC = b"HFC1"
+HEADER = struct.Struct("<4sHIi")
+LEGACY_HEADER = struct.Struct("<4sHI")
+MISSING = np.iinfo(np.int32).min
+MPS_TO_MPH = 2.2369362920544
+
+# name -> (dtype, scale); scaled fields are stored as fixed-point integers
+NUMERIC_FIELDS = {
+    "dt": (np.int64, None),
+    "temp": (np.int32, 100),
+    "feels_like": (np.int32, 100),
+    "pressure": (np.int32, None),
+    "humidity": (np.int32, None),
+    "dew_point": (np.int32, 100),
+    "uvi": (np.int32, 100),
+    "clouds": (np.int32, None),
+    "visibility": (np.int32, None),
+    "wind_speed": (np.int32, 100),
+    "wind_deg": (np.int32, None),
+    "wind_gust": (np.int32, 100),
+    "pop": (np.int32, 100),
+    "rain": (np.int32, 100),
+    "snow": (np.int32, 100),
+}
+PRECIPITATION_FIELDS = ("rain", "snow")
+TEMPERATURE_FIELDS = ("temp", "feels_like", "dew_point")
+SPEED_FIELDS = ("wind_speed", "wind_gust")
+FORECAST_FIELDS = tuple(NUMERIC_FIELDS) + ("weather",)
+
+def _column_value(entry: dict, field: str):
+    value = entry.get(field)
+    if field in PRECIPITATION_FIELDS and value is not None:
+        value = value.get("1h")
+    return value
+
+def encode_hourly_forecast(hourly: List[dict], timezone_offset: int = 0) -> bytes:
+    weather_table: List[list] = []
+    weather_ids: Dict[str, int] = {}
+    weather_index = np.empty(len(hourly), dtype=np.uint16)
+    for i, entry in enumerate(hourly):
+        weather = entry.get("weather", [])
+        signature = json.dumps(weather, sort_keys=True)
+        if signature not in weather_ids:
+            weather_ids[signature] = len(weather_table)
+            weather_table.append(weather)
+        weather_index[i] = weather_ids[signature]
+
+    columns = []
+    for field, (dtype, scale) in NUMERIC_FIELDS.items():
+        values = [_column_value(entry, field) for entry in hourly]
+        if scale is None:
+            column = np.array([MISSING if value is None else value for value in values], dtype=dtype)
+        else:
+            column = np.array([MISSING if value is None else round(value * scale) for value in values], dtype=dtype)
+        columns.append(column.tobytes())
+
+    table = json.dumps(weather_table, separators=(",", ":")).encode()
+    return b"".join([HEADER.pack(MAGIC, len(hourly), len(table), timezone_offset), table, *columns, weather_index.tobytes()])
+
+class ColumnarForecast:
+    def __init__(self, columns: Dict[str, np.ndarray], weather_table: List[list], timezone_offset: int = 0):
+        self.columns = columns
+        self.weather_table = weather_table
+        self.timezone_offset = timezone_offset
+        self.responses: Dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["dt"])
+
+    @property
+    def size(self) -> int:
+        return sum(column.nbytes for column in self.columns.values()) + sum(prepared.size for prepared in self.responses.values())
+
+    def select(self, start: Optional[int] = None, end: Optional[int] = None, hours: Optional[int] = None) -> slice:
+        dt = self.columns["dt"]
+        first = int(np.searchsorted(dt, start, side="left")) if start is not None else 0
+        last = int(np.searchsorted(dt, end, side="right")) if end is not None else len(dt)
+        if hours is not None:
+            last = min(last, first + hours)
+        return slice(first, max(first, last))
+
+    def to_entries(self, rows: slice = slice(None), fields: Optional[Iterable[str]] = None, units: str = "metric") -> List[dict]:
+        fields = FORECAST_FIELDS if fields is None else ["dt", *(field for field in fields if field != "dt")]
+        count = len(self.columns["dt"][rows])
+        output_columns = []
+        for field in fields:
+            if field == "weather":
+                table = self.weather_table
+                output_columns.append((field, [table[i] for i in self.columns["weather"][rows].tolist()], None))
+                continue
+            raw = self.columns[field][rows]
+            missing = raw == MISSING if field != "dt" else None
+            scale = NUMERIC_FIELDS[field][1]
+            values = raw
+            if scale is not None:
+                values = raw / scale
+                if units == "imperial" and field in TEMPERATURE_FIELDS:
+                    values = values * 1.8 + 32
+                elif units == "imperial" and field in SPEED_FIELDS:
+                    values = values * MPS_TO_MPH
+                values = np.round(values, 2)
+            values = values.tolist()
+            if missing is not None and missing.any():
+                values = [None if is_missing else value for value, is_missing in zip(values, missing.tolist())]
+            if field in PRECIPITATION_FIELDS:
+                values = [None if value is None else {"1h": value} for value in values]
+            output_columns.append((field, values, missing))
+
+        entries = [{} for _ in range(count)]
+        for field, values, missing in output_columns:
+            for entry, value in zip(entries, values):
+                if value is not None:
+                    entry[field] = value
+        return entries
+
+    def to_response(self, units: str = "metric", rows: slice = slice(None), fields: Optional[Iterable[str]] = None) -> dict:
+        return {"hourly_forecast": self.to_entries(rows, fields, units)}
+
+def decode_hourly_forecast(blob: bytes) -> ColumnarForecast:
+    if blob[:4] == LEGACY_MAGIC:
+        _, count, table_length = LEGACY_HEADER.unpack_from(blob)
+        timezone_offset, offset = 0, LEGACY_HEADER.size
+    else:
+        magic, count, table_length, timezone_offset = HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise ValueError("Unknown forecast encoding")
+        offset = HEADER.size
+    weather_table = json.loads(blob[offset:offset + table_length])
+    offset += table_length
+
+    columns = {}
+    for field, (dtype, _) in NUMERIC_FIELDS.items():
+        columns[field] = np.frombuffer(blob, dtype=dtype, count=count, offset=offset)
+        offset += count * np.dtype(dtype).itemsize
+    columns["weather"] = np.frombuffer(blob, dtype=np.uint16, count=count, offset=offset)
+    return ColumnarForecast(columns, weather_table, timezone_offset)
+
+def columnar_from_hourly(hourly: List[dict], timezone_offset: int = 0) -> ColumnarForecast:
+    return decode_hourly_forecast(encode_hourly_forecast(hourly, timezone_offset))
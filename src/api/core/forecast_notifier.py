@@ -0,0 +1,49 @@
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Set
+
+class ForecastNotifier:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self._waiters: Dict[str, Set[asyncio.Event]] = defaultdict(set)
+
+    async def run(self):
+        await self.redis_client.listen_for_forecasts(self.notify, self.notify_all)
+
+    def notify(self, key: str):
+        for event in self._waiters.get(key, ()):
+            event.set()
+
+    def notify_all(self):
+        for events in self._waiters.values():
+            for event in events:
+                event.set()
+
+    async def wait_until_ready(self, key: str, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        with self.watch(key) as ready:
+            while await self.redis_client.is_forecast_pending(key):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(ready.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return False
+                ready.clear()
+        return True
+
+    @contextmanager
+    def watch(self, key: str):
+        event = asyncio.Event()
+        self._waiters[key].add(event)
+        try:
+            yield event
+        finally:
+            events = self._waiters.get(key)
+            if events is not None:
+                events.discard(event)
+                if not events:
+                    del self._waiters[key]
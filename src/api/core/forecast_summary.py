@@ -0,0 +1,88 @@
+import datetime
+from typing import Dict, List
+import numpy as np
+from src.api.core.forecast_columns import ColumnarForecast, MISSING, MPS_TO_MPH, NUMERIC_FIELDS
+
+EPOCH = datetime.date(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+BEST_HOURS = 3
+COMFORT_TEMP = 21.0
+SUMMARY_UNITS = ("metric", "imperial")
+
+# output name -> (column, reducer); reducers skip missing hours
+AGGREGATES = {
+    "temp_min": ("temp", np.fmin),
+    "temp_max": ("temp", np.fmax),
+    "temp_mean": ("temp", None),
+    "feels_like_min": ("feels_like", np.fmin),
+    "feels_like_max": ("feels_like", np.fmax),
+    "pop_max": ("pop", np.fmax),
+    "uvi_max": ("uvi", np.fmax),
+    "wind_speed_max": ("wind_speed", np.fmax),
+    "wind_gust_max": ("wind_gust", np.fmax),
+}
+TEMPERATURE_AGGREGATES = ("temp_min", "temp_max", "temp_mean", "feels_like_min", "feels_like_max")
+SPEED_AGGREGATES = ("wind_speed_max", "wind_gust_max")
+
+def _values(forecast: ColumnarForecast, field: str) -> np.ndarray:
+    raw = forecast.columns[field]
+    values = raw.astype(np.float64)
+    values[raw == MISSING] = np.nan
+    scale = NUMERIC_FIELDS[field][1]
+    return values / scale if scale is not None else values
+
+def _to_list(values: np.ndarray) -> list:
+    values = np.round(values, 2)
+    if not np.isnan(values).any():
+        return values.tolist()
+    return [None if value != value else value for value in values.tolist()]
+
+def _aggregate(forecast: ColumnarForecast, groups: np.ndarray, units: str) -> Dict[str, list]:
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    counts = np.diff(np.r_[starts, len(groups)])
+    columns = {field: _values(forecast, field) for field in {field for field, _ in AGGREGATES.values()}}
+
+    aggregates = {}
+    for name, (field, reducer) in AGGREGATES.items():
+        values = columns[field]
+        if reducer is None:
+            present = np.add.reduceat((~np.isnan(values)).astype(np.int64), starts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                aggregates[name] = np.add.reduceat(np.nan_to_num(values), starts) / present
+        else:
+            aggregates[name] = reducer.reduceat(values, starts)
+    for field in ("rain", "snow"):
+        aggregates[field] = np.add.reduceat(np.nan_to_num(_values(forecast, field)), starts)
+    aggregates["precipitation"] = aggregates["rain"] + aggregates["snow"]
+    if units == "imperial":
+        for name in TEMPERATURE_AGGREGATES:
+            aggregates[name] = aggregates[name] * 1.8 + 32
+        for name in SPEED_AGGREGATES:
+            aggregates[name] = aggregates[name] * MPS_TO_MPH
+
+    # "best" hours: dry, light wind and close to a comfortable temperature
+    score = np.abs(columns["feels_like"] - COMFORT_TEMP) + 10 * np.nan_to_num(columns["pop"]) + 0.5 * np.nan_to_num(columns["wind_speed"])
+    order = np.lexsort((np.nan_to_num(score, nan=np.inf), groups))
+    rank = np.arange(len(groups)) - np.repeat(starts, counts)
+    best = order[rank < BEST_HOURS]
+    dt = forecast.columns["dt"]
+    best_hours = np.split(dt[best], np.cumsum(np.minimum(counts, BEST_HOURS))[:-1])
+
+    output = {"start": dt[starts].tolist(), "end": (dt[starts + counts - 1] + 3600).tolist(), "hours": counts.tolist()}
+    output.update((name, _to_list(values)) for name, values in aggregates.items())
+    output["best_hours"] = [hours.tolist() for hours in best_hours]
+    return output
+
+def _periods(output: Dict[str, list]) -> List[dict]:
+    names = list(output)
+    return [dict(zip(names, row)) for row in zip(*(output[name] for name in names))]
+
+def summarize_forecast(forecast: ColumnarForecast, window_hours: int, units: str = "metric") -> dict:
+    if len(forecast) == 0:
+        return {"timezone_offset": forecast.timezone_offset, "window_hours": window_hours, "daily": [], "windows": []}
+    local = forecast.columns["dt"] + forecast.timezone_offset
+    days = local // SECONDS_PER_DAY
+    dates = [(EPOCH + datetime.timedelta(days=day)).isoformat() for day in np.unique(days).tolist()]
+    daily = [{"date": date, **period} for date, period in zip(dates, _periods(_aggregate(forecast, days, units)))]
+    windows = _periods(_aggregate(forecast, local // (window_hours * 3600), units))
+    return {"timezone_offset": forecast.timezone_offset, "window_hours": window_hours, "daily": daily, "windows": windows}
@@ -0,0 +1,91 @@
+import math
+from typing import Tuple
+from src.api.core.config import settings
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_INDEX = {c: i for i, c in enumerate(GEOHASH_ALPHABET)}
+KM_PER_DEGREE_LAT = 111.32
+EARTH_RADIUS_KM = 6371.0088
+
+def encode_geohash(lat: float, lon: float, precision: int) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+def decode_geohash(geohash: str) -> Tuple[float, float]:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (bits >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+def _grid_steps(row: int, cell_km: float) -> Tuple[float, float]:
+    lat_step = cell_km / KM_PER_DEGREE_LAT
+    row_lat = max(min((row + 0.5) * lat_step, 89.9), -89.9)
+    lon_step = min(cell_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(row_lat))), 360.0)
+    return lat_step, lon_step
+
+def snap_to_grid(lat: float, lon: float, cell_km: float) -> Tuple[int, int]:
+    row = math.floor(lat / (cell_km / KM_PER_DEGREE_LAT))
+    _, lon_step = _grid_steps(row, cell_km)
+    return row, math.floor(lon / lon_step)
+
+def grid_cell_center(row: int, col: int, cell_km: float) -> Tuple[float, float]:
+    lat_step, lon_step = _grid_steps(row, cell_km)
+    return (row + 0.5) * lat_step, (col + 0.5) * lon_step
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def quantize_location(lat: float, lon: float) -> Tuple[str, float, float]:
+    if settings.location_key_mode == "geohash":
+        geohash = encode_geohash(lat, lon, settings.geohash_precision)
+        center_lat, center_lon = decode_geohash(geohash)
+        return f"gh:{geohash}", center_lat, center_lon
+    if settings.location_key_mode == "grid":
+        row, col = snap_to_grid(lat, lon, settings.location_grid_km)
+        center_lat, center_lon = grid_cell_center(row, col, settings.location_grid_km)
+        return f"grid:{settings.location_grid_km:g}:{row}:{col}", center_lat, center_lon
+    return f"{lat:.4f},{lon:.4f}", round(lat, 4), round(lon, 4)
+
+def location_key_center(location_key: str) -> Tuple[float, float]:
+    kind, _, rest = location_key.partition(":")
+    if kind == "gh":
+        return decode_geohash(rest)
+    if kind == "grid":
+        cell_km, row, col = rest.split(":")
+        return grid_cell_center(int(row), int(col), float(cell_km))
+    lat, lon = location_key.split(",")
+    return float(lat), float(lon)
@@ -0,0 +1,19 @@
+from collections import Counter
+from typing import Dict
+
+class AccessTracker:
+    def __init__(self):
+        self._counts: Counter = Counter()
+
+    def record(self, member: str):
+        self._counts[member] += 1
+
+    def drain(self) -> Dict[str, int]:
+        counts, self._counts = self._counts, Counter()
+        return dict(counts)
+
+def city_member(city: str) -> str:
+    return f"city:{city}"
+
+def location_member(location_key: str) -> str:
+    return f"loc:{location_key}"
@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        value, expires_at, _ = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.pop(key)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 0):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self.pop(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._data[key] = (value, expires_at, size)
+        self.current_bytes += size
+        self._evict()
+
+    def resize(self, key: Hashable, size: int):
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING or item[2] == size:
+            return
+        value, expires_at, old_size = item
+        self._data[key] = (value, expires_at, size)
+        self.current_bytes += size - old_size
+        self._evict()
+
+    def _evict(self):
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self.current_bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self.current_bytes -= evicted_size
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, _MISSING)
+        if item is _MISSING:
+            return default
+        self.current_bytes -= item[2]
+        return item[0]
+
+    def clear(self):
+        self._data.clear()
+        self.current_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
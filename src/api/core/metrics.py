@@ -0,0 +1,70 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from src.api.core.config import settings
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+STAGE_SECONDS = Histogram("weather_api_stage_seconds", "Time spent in each hot-path stage", ["stage"], buckets=STAGE_BUCKETS)
+CACHE_LOOKUPS = Counter("weather_api_cache_lookups_total", "Cache lookups by key family and result", ["family", "result"])
+UPSTREAM_RESPONSES = Counter("weather_api_upstream_responses_total", "OpenWeatherMap responses by endpoint and status", ["endpoint", "status"])
+RATE_LIMIT_REJECTIONS = Counter("weather_api_rate_limit_rejections_total", "Upstream calls rejected by the rate limiter by priority lane", ["lane"])
+BACKGROUND_TASKS = Gauge("weather_api_background_tasks_in_flight", "Background refresh and store tasks currently running")
+
+server_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timings", default=None)
+
+@contextmanager
+def timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        timings = server_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def record_cache_lookup(family: str, result: str):
+    CACHE_LOOKUPS.labels(family, result).inc()
+
+def track_background(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with BACKGROUND_TASKS.track_inprogress():
+            return await func(*args, **kwargs)
+    return wrapper
+
+def render_metrics() -> Tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def format_server_timing(timings: List[Tuple[str, float]]) -> str:
+    return ", ".join(f"{stage};dur={elapsed * 1000:.2f}" for stage, elapsed in timings)
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.server_timing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = server_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = ("total", time.perf_counter() - started)
+                header = format_server_timing([*timings, total]).encode()
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            server_timings.reset(token)
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Tuple
+from src.api.clients.redis_client import RedisClient
+from src.api.core.config import settings
+from src.api.core.errors import UpstreamUnavailable
+from src.api.core.metrics import RATE_LIMIT_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+FOREGROUND = "foreground"
+BACKGROUND = "background"
+
+upstream_priority: ContextVar[str] = ContextVar("upstream_priority", default=FOREGROUND)
+
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local reserve_fraction = tonumber(ARGV[1])
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local window_ms = tonumber(ARGV[i * 2 + 1])
+    local rate = capacity / window_ms
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + math.max(0, now - updated_at) * rate)
+    local floor = capacity * reserve_fraction
+    if available - 1 < floor then
+        wait = math.max(wait, math.ceil((floor + 1 - available) / rate))
+    end
+    tokens[i] = available
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local window_ms = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i] - 1), 'ts', now)
+    redis.call('PEXPIRE', key, window_ms * 2)
+end
+return 0
+"""
+
+class RateLimitExceeded(UpstreamUnavailable):
+    def __init__(self, retry_after: float):
+        super().__init__("OpenWeatherMap rate limit reached, try again later", retry_after)
+
+class UpstreamRateLimiter:
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self._take_token = redis_client.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self.buckets: List[Tuple[str, int, int]] = [
+            (key, capacity, window_ms)
+            for key, capacity, window_ms in (
+                ("ratelimit:{owm}:minute", settings.owm_rate_limit_per_minute, 60_000),
+                ("ratelimit:{owm}:day", settings.owm_rate_limit_per_day, 86_400_000),
+            )
+            if capacity > 0
+        ]
+        self._foreground_waiting = 0
+        self.stats: Dict[str, Dict[str, float]] = {
+            lane: {"acquired": 0, "rejected": 0, "wait_seconds_total": 0.0}
+            for lane in (FOREGROUND, BACKGROUND)
+        }
+
+    async def acquire(self, priority: str = FOREGROUND):
+        if not self.buckets:
+            return
+        started = time.monotonic()
+        max_wait = settings.rate_limit_foreground_max_wait if priority == FOREGROUND else settings.rate_limit_background_max_wait
+        reserve = 0 if priority == FOREGROUND else settings.rate_limit_background_reserve
+        if priority == FOREGROUND:
+            self._foreground_waiting += 1
+        try:
+            while True:
+                if priority == BACKGROUND and self._foreground_waiting:
+                    wait_ms = 50
+                else:
+                    args = [reserve]
+                    for _, capacity, window_ms in self.buckets:
+                        args += [capacity, window_ms]
+                    wait_ms = await self._take_token(keys=[key for key, _, _ in self.buckets], args=args)
+                    if wait_ms == 0:
+                        self.stats[priority]["acquired"] += 1
+                        self.stats[priority]["wait_seconds_total"] += time.monotonic() - started
+                        return
+
+                elapsed = time.monotonic() - started
+                if elapsed + wait_ms / 1000 > max_wait:
+                    self.stats[priority]["rejected"] += 1
+                    RATE_LIMIT_REJECTIONS.labels(priority).inc()
+                    self.stats[priority]["wait_seconds_total"] += elapsed
+                    logger.warning(f"Rejected {priority} upstream call, rate limit wait {wait_ms} ms")
+                    raise RateLimitExceeded(wait_ms / 1000)
+                await asyncio.sleep(wait_ms / 1000)
+        finally:
+            if priority == FOREGROUND:
+                self._foreground_waiting -= 1
@@ -0,0 +1,88 @@
+import hashlib
+from typing import Any, Callable, Dict, Hashable, Optional
+import orjson
+from fastapi import Request, Response
+from src.api.core.compression import choose_encoding, compress_response, response_encodings
+from src.api.core.metrics import timed
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value)
+
+class PreparedResponse:
+    __slots__ = ("body", "etag", "encodings", "_encoded")
+
+    def __init__(self, body: bytes, gzip_body: Optional[bytes] = None):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.encodings = response_encodings(body)
+        self._encoded: Dict[str, bytes] = {"gzip": gzip_body} if gzip_body and self.encodings else {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self._encoded.values())
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            with timed("compress"):
+                data = self._encoded[encoding] = compress_response(self.body, encoding)
+        return data
+
+    def encoded_etag(self, encoding: Optional[str]) -> str:
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+def prepare_response(value: Any) -> PreparedResponse:
+    with timed("serialize"):
+        body = dumps(value)
+    return PreparedResponse(body)
+
+def memoized_response(responses: Dict[Hashable, PreparedResponse], key: Hashable, build: Callable[[], Any]) -> PreparedResponse:
+    prepared = responses.get(key)
+    if prepared is None:
+        prepared = responses[key] = prepare_response(build())
+    return prepared
+
+def memoized_size(responses: Dict[Hashable, PreparedResponse]) -> int:
+    return sum(prepared.size for prepared in responses.values())
+
+class CachedPayload:
+    __slots__ = ("prepared", "_value", "responses")
+
+    def __init__(self, body: bytes, value: Any = None, gzip_body: Optional[bytes] = None):
+        self.prepared = PreparedResponse(body, gzip_body)
+        self._value = value
+        self.responses: Dict[Hashable, PreparedResponse] = {}
+
+    @property
+    def size(self) -> int:
+        return self.prepared.size + memoized_size(self.responses)
+
+    @property
+    def value(self) -> Any:
+        if self._value is None:
+            self._value = orjson.loads(self.prepared.body)
+        return self._value
+
+def etag_matches(if_none_match: Optional[str], prepared: PreparedResponse) -> bool:
+    if not if_none_match:
+        return False
+    etags = {prepared.etag, *(prepared.encoded_etag(encoding) for encoding in prepared.encodings)}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") in etags:
+            return True
+    return False
+
+def prepared_response(request: Request, prepared: PreparedResponse, headers: Optional[Dict[str, str]] = None) -> Response:
+    encoding = choose_encoding(request.headers.get("accept-encoding"), prepared.encodings)
+    headers = {**(headers or {}), "ETag": prepared.encoded_etag(encoding)}
+    if prepared.encodings:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), prepared):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(prepared.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(prepared.encoded(encoding), media_type="application/json", headers=headers)
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from src.api.clients.redis_client import RedisClient
+from src.api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+class RequestCoalescer:
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self.single_flight = SingleFlight()
+
+    async def run(self, key: str, loader: Callable[[], Awaitable[Any]], read_cached: Optional[Callable[[], Awaitable[Any]]] = None, wait: bool = True) -> Any:
+        return await self.single_flight.do(key, lambda: self._run_locked(key, loader, read_cached, wait))
+
+    async def _run_locked(self, key: str, loader, read_cached, wait: bool):
+        lock_name = f"lock:{key}"
+        deadline = time.monotonic() + settings.coalesce_wait_timeout
+        while True:
+            token = await self.redis_client.acquire_lock(lock_name, settings.coalesce_lock_ttl)
+            if token:
+                try:
+                    return await loader()
+                finally:
+                    await self.redis_client.release_lock(lock_name, token)
+
+            if not wait:
+                return None
+
+            
+            while time.monotonic() < deadline and await self.redis_client.lock_exists(lock_name):
+                await asyncio.sleep(settings.coalesce_poll_interval)
+                if read_cached is not None:
+                    cached = await read_cached()
+                    if cached is not None:
+                        return cached
+
+            if read_cached is not None:
+                cached = await read_cached()
+                if cached is not None:
+                    return cached
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for {lock_name}, fetching without coalescing")
+                return await loader()
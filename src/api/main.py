@@ -1,23 +1,73 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.routers import weather
-from src.api.clients.redis_client import RedisClient
+from fastapi.middleware.gzip import GZipMiddleware
+from src.api.routers import weather, stats
+from src.api.clients.openweathermap_client import OpenWeatherMapClient, create_http_client
+from src.api.clients.redis_client import RedisClient, create_redis_pool, create_local_cache
+from src.api.services.geocoding_service import GeocodingService
+from src.api.core.singleflight import RequestCoalescer
+from src.api.core.hotkeys import AccessTracker
+from src.api.core.rate_limiter import UpstreamRateLimiter
+from src.api.core.circuit_breaker import CircuitBreaker
+from src.api.core.forecast_notifier import ForecastNotifier
+from src.api.core.metrics import ServerTimingMiddleware
+from src.api.core.config import settings
+from src.api.services.weather_service import WeatherService
+from src.api.services.refresh_ahead import RefreshAheadScheduler
+from src.api.services.warmup import CacheWarmer, configured_targets
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    redis_client = RedisClient()
+    http_client = create_http_client()
+    redis_client = RedisClient(create_redis_pool(), create_local_cache())
+    rate_limiter = UpstreamRateLimiter(redis_client)
+    circuit_breaker = CircuitBreaker()
+    openweathermap_client = OpenWeatherMapClient(http_client, rate_limiter, circuit_breaker)
+    app.state.openweathermap_client = openweathermap_client
+    app.state.redis_client = redis_client
+    app.state.rate_limiter = rate_limiter
+    app.state.circuit_breaker = circuit_breaker
+    geocoding_service = GeocodingService(openweathermap_client, redis_client)
+    request_coalescer = RequestCoalescer(redis_client)
+    access_tracker = AccessTracker()
+    forecast_notifier = ForecastNotifier(redis_client)
+    app.state.geocoding_service = geocoding_service
+    app.state.request_coalescer = request_coalescer
+    app.state.access_tracker = access_tracker
+    app.state.forecast_notifier = forecast_notifier
+    weather_service = WeatherService(openweathermap_client, redis_client, geocoding_service, request_coalescer, access_tracker)
+    background_jobs = [asyncio.create_task(forecast_notifier.run())]
+    if redis_client.local_cache is not None:
+        background_jobs.append(asyncio.create_task(redis_client.listen_for_invalidations()))
+    if settings.warmup_enabled:
+        cache_warmer = CacheWarmer(weather_service, geocoding_service, redis_client)
+        app.state.cache_warmer = cache_warmer
+        background_jobs.append(asyncio.create_task(cache_warmer.run(configured_targets(settings.warmup_locations, settings.warmup_file))))
+    if settings.refresh_ahead_enabled:
+        scheduler = RefreshAheadScheduler(weather_service, redis_client, access_tracker)
+        background_jobs.append(asyncio.create_task(scheduler.run()))
     yield
+    for job in background_jobs:
+        job.cancel()
+    await asyncio.gather(*background_jobs, return_exceptions=True)
+    await http_client.aclose()
     await redis_client.close()
 
 app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(GZipMiddleware, minimum_size=settings.response_compression_min_size)
+app.add_middleware(ServerTimingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"],  
+    expose_headers=["ETag", "X-Cache-Status"],
 )
 
 app.include_router(weather.router)
+app.include_router(stats.router)
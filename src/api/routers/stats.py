@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Response
+from src.api.clients.redis_client import RedisClient
+from src.api.core.dependencies import get_redis_client, get_rate_limiter, get_circuit_breaker, get_cache_warmer
+from src.api.core.rate_limiter import UpstreamRateLimiter
+from src.api.core.circuit_breaker import CircuitBreaker
+from src.api.core.metrics import render_metrics
+from src.api.services.warmup import CacheWarmer
+from src.api.core.responses import dumps
+from typing import Optional
+
+router = APIRouter()
+
+@router.get("/cache/stats")
+async def get_cache_stats(redis_client: RedisClient = Depends(get_redis_client)):
+    return redis_client.get_stats()
+
+@router.get("/upstream/stats")
+async def get_upstream_stats(rate_limiter: UpstreamRateLimiter = Depends(get_rate_limiter), circuit_breaker: CircuitBreaker = Depends(get_circuit_breaker)):
+    return {**rate_limiter.stats, "circuit": {"state": circuit_breaker.state, "failures": circuit_breaker.failures}}
+
+@router.get("/metrics")
+async def get_metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+@router.get("/ready")
+async def get_readiness(cache_warmer: Optional[CacheWarmer] = Depends(get_cache_warmer)):
+    if cache_warmer is None:
+        return {"status": "ready"}
+    body = {"status": cache_warmer.status, "warmup": cache_warmer.last_report}
+    return Response(dumps(body), status_code=200 if cache_warmer.ready else 503, media_type="application/json")
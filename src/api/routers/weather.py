@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse
 from src.api.services.weather_service import WeatherService
-from src.api.schemas.weather import WeatherResponse, HourlyForecastResponse
+from src.api.schemas.weather import WeatherResponse, HourlyForecastResponse, ForecastSummaryResponse, BatchRequest, BatchResponse
+from src.api.core.config import settings
+from src.api.core.forecast_columns import FORECAST_FIELDS
+from src.api.core.errors import UpstreamUnavailable
+from src.api.core.hotkeys import city_member, location_member
+from src.api.core.forecast_notifier import ForecastNotifier
+from src.api.core.dependencies import get_forecast_notifier
+from src.api.core.responses import prepared_response
 from enum import Enum
-from typing import Union, Dict
+from typing import Union, Dict, List, Optional
+import json
+import math
 
 router = APIRouter()
 
@@ -10,57 +20,139 @@ class Units(str, Enum):
     metric = "metric"
     imperial = "imperial"
 
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in FORECAST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown forecast fields: {', '.join(unknown)}")
+    return requested
+
+def stream_forecast(weather_service: WeatherService, forecast_notifier: ForecastNotifier, key: str, member: str, units: str, start: Optional[int], end: Optional[int], hours: Optional[int], fields: Optional[List[str]], background_tasks: BackgroundTasks) -> StreamingResponse:
+    async def events():
+        forecast_data, pending = await weather_service.get_hourly_forecast(key, units, start, end, hours, fields, member, background_tasks)
+        if pending:
+            yield "event: pending\ndata: {}\n\n"
+            while not await forecast_notifier.wait_until_ready(key, settings.forecast_stream_keepalive):
+                yield ": keepalive\n\n"
+            forecast_data, pending = await weather_service.get_hourly_forecast(key, units, start, end, hours, fields, member, background_tasks)
+        if forecast_data is None:
+            yield f"event: not_found\ndata: {json.dumps({'detail': 'Forecast not found'})}\n\n"
+        else:
+            yield f"event: forecast\ndata: {forecast_data.body.decode()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @router.get("/weather/{city_name}", response_model=WeatherResponse)
-async def get_weather(city_name: str, background_tasks: BackgroundTasks, units: Units = Units.metric, weather_service: WeatherService = Depends()):
+async def get_weather(city_name: str, background_tasks: BackgroundTasks, request: Request, units: Units = Units.metric, weather_service: WeatherService = Depends()):
     try:
         weather_data = await weather_service.fetch_weather(city_name, units.value, background_tasks)
-        return weather_data
+        return prepared_response(request, weather_data, {"X-Cache-Status": weather_service.cache_status})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/weather/batch", response_model=BatchResponse)
+async def get_weather_batch(batch: BatchRequest, background_tasks: BackgroundTasks, weather_service: WeatherService = Depends()):
+    if len(batch.locations) > settings.batch_max_locations:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_locations} locations per batch")
+    results = await weather_service.fetch_weather_batch(batch.locations, batch.units, background_tasks)
+    return {"results": results}
+
 @router.get("/weather-by-location", response_model=WeatherResponse)
-async def get_weather_by_location(lat: float, lon: float, background_tasks: BackgroundTasks, units: Units = Units.metric, weather_service: WeatherService = Depends()):
+async def get_weather_by_location(lat: float, lon: float, background_tasks: BackgroundTasks, request: Request, units: Units = Units.metric, weather_service: WeatherService = Depends()):
     try:
         weather_data = await weather_service.fetch_weather_by_coordinates(lat, lon, units.value, background_tasks)
-        return weather_data
+        return prepared_response(request, weather_data, {"X-Cache-Status": weather_service.cache_status})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/forecast/{city_name}", response_model=Union[HourlyForecastResponse, Dict])
-async def get_forecast(city_name: str, units: Units = Units.metric, weather_service: WeatherService = Depends()):
+async def get_forecast(city_name: str, background_tasks: BackgroundTasks, request: Request, units: Units = Units.metric, from_: Optional[int] = Query(None, alias="from"), to: Optional[int] = None, hours: Optional[int] = Query(None, ge=1), fields: Optional[str] = None, wait: float = Query(0, ge=0), weather_service: WeatherService = Depends(), forecast_notifier: ForecastNotifier = Depends(get_forecast_notifier)):
+    requested_fields = parse_fields(fields)
     
-    if await weather_service.redis_client.is_forecast_pending(city_name):
-        return {"status": "pending", "retry_after": 30}
+    forecast_data, pending = await weather_service.get_hourly_forecast(city_name, units.value, from_, to, hours, requested_fields, city_member(city_name), background_tasks)
+    if pending and wait and await forecast_notifier.wait_until_ready(city_name, min(wait, settings.forecast_wait_max)):
+        forecast_data, pending = await weather_service.get_hourly_forecast(city_name, units.value, from_, to, hours, requested_fields, city_member(city_name), background_tasks)
 
     
-    forecast_data = await weather_service.get_hourly_forecast(city_name, units.value)
-    
-    
+    if pending:
+        return {"status": "pending", "retry_after": 30}
     if forecast_data is None:
         raise HTTPException(status_code=404, detail="Forecast not found")
     
+    return prepared_response(request, forecast_data, {"X-Cache-Status": weather_service.cache_status})
+
+@router.get("/forecast/{city_name}/stream")
+async def get_forecast_stream(city_name: str, background_tasks: BackgroundTasks, units: Units = Units.metric, from_: Optional[int] = Query(None, alias="from"), to: Optional[int] = None, hours: Optional[int] = Query(None, ge=1), fields: Optional[str] = None, weather_service: WeatherService = Depends(), forecast_notifier: ForecastNotifier = Depends(get_forecast_notifier)):
+    requested_fields = parse_fields(fields)
+    return stream_forecast(weather_service, forecast_notifier, city_name, city_member(city_name), units.value, from_, to, hours, requested_fields, background_tasks)
+
+@router.get("/forecast/{city_name}/summary", response_model=Union[ForecastSummaryResponse, Dict])
+async def get_forecast_summary(city_name: str, background_tasks: BackgroundTasks, request: Request, units: Units = Units.metric, window: Optional[int] = Query(None, ge=1, le=48), wait: float = Query(0, ge=0), weather_service: WeatherService = Depends(), forecast_notifier: ForecastNotifier = Depends(get_forecast_notifier)):
+    summary, pending = await weather_service.get_forecast_summary(city_name, units.value, window, city_member(city_name), background_tasks)
+    if pending and wait and await forecast_notifier.wait_until_ready(city_name, min(wait, settings.forecast_wait_max)):
+        summary, pending = await weather_service.get_forecast_summary(city_name, units.value, window, city_member(city_name), background_tasks)
+
     
-    return forecast_data
+    if pending:
+        return {"status": "pending", "retry_after": 30}
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Forecast not found")
+    
+    return prepared_response(request, summary, {"X-Cache-Status": weather_service.cache_status})
+
+@router.post("/forecast/batch", response_model=BatchResponse)
+async def get_forecast_batch(batch: BatchRequest, background_tasks: BackgroundTasks, weather_service: WeatherService = Depends()):
+    if len(batch.locations) > settings.batch_max_locations:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_locations} locations per batch")
+    results = await weather_service.fetch_forecast_batch(batch.locations, batch.units, background_tasks)
+    return {"results": results}
 
 @router.get("/forecast-by-location", response_model=Union[HourlyForecastResponse, Dict])
-async def get_forecast_by_location(lat: float, lon: float, units: Units = Units.metric, weather_service: WeatherService = Depends()):
+async def get_forecast_by_location(lat: float, lon: float, background_tasks: BackgroundTasks, request: Request, units: Units = Units.metric, from_: Optional[int] = Query(None, alias="from"), to: Optional[int] = None, hours: Optional[int] = Query(None, ge=1), fields: Optional[str] = None, wait: float = Query(0, ge=0), weather_service: WeatherService = Depends(), forecast_notifier: ForecastNotifier = Depends(get_forecast_notifier)):
+    requested_fields = parse_fields(fields)
+    location_key = await weather_service.resolve_location_key(lat, lon)
     
-    location_key = f"{lat:.4f},{lon:.4f}"
     
+    forecast_data, pending = await weather_service.get_hourly_forecast(location_key, units.value, from_, to, hours, requested_fields, location_member(location_key), background_tasks)
+    if pending and wait and await forecast_notifier.wait_until_ready(location_key, min(wait, settings.forecast_wait_max)):
+        forecast_data, pending = await weather_service.get_hourly_forecast(location_key, units.value, from_, to, hours, requested_fields, location_member(location_key), background_tasks)
+
     
-    if await weather_service.redis_client.is_forecast_pending(location_key):
+    if pending:
         return {"status": "pending", "retry_after": 30}
-
+    if forecast_data is None:
+        raise HTTPException(status_code=404, detail="Forecast not found")
     
-    forecast_data = await weather_service.get_hourly_forecast(location_key, units.value)
+    return prepared_response(request, forecast_data, {"X-Cache-Status": weather_service.cache_status})
+
+@router.get("/forecast-by-location/stream")
+async def get_forecast_by_location_stream(lat: float, lon: float, background_tasks: BackgroundTasks, units: Units = Units.metric, from_: Optional[int] = Query(None, alias="from"), to: Optional[int] = None, hours: Optional[int] = Query(None, ge=1), fields: Optional[str] = None, weather_service: WeatherService = Depends(), forecast_notifier: ForecastNotifier = Depends(get_forecast_notifier)):
+    requested_fields = parse_fields(fields)
+    location_key = await weather_service.resolve_location_key(lat, lon)
+    return stream_forecast(weather_service, forecast_notifier, location_key, location_member(location_key), units.value, from_, to, hours, requested_fields, background_tasks)
+
+@router.get("/forecast-by-location/summary", response_model=Union[ForecastSummaryResponse, Dict])
+async def get_forecast_summary_by_location(lat: float, lon: float, background_tasks: BackgroundTasks, request: Request, units: Units = Units.metric, window: Optional[int] = Query(None, ge=1, le=48), wait: float = Query(0, ge=0), weather_service: WeatherService = Depends(), forecast_notifier: ForecastNotifier = Depends(get_forecast_notifier)):
+    location_key = await weather_service.resolve_location_key(lat, lon)
     
+    summary, pending = await weather_service.get_forecast_summary(location_key, units.value, window, location_member(location_key), background_tasks)
+    if pending and wait and await forecast_notifier.wait_until_ready(location_key, min(wait, settings.forecast_wait_max)):
+        summary, pending = await weather_service.get_forecast_summary(location_key, units.value, window, location_member(location_key), background_tasks)
+
     
-    if forecast_data is None:
+    if pending:
+        return {"status": "pending", "retry_after": 30}
+    if summary is None:
         raise HTTPException(status_code=404, detail="Forecast not found")
     
-    
-    return forecast_data
\ No newline at end of file
+    return prepared_response(request, summary, {"X-Cache-Status": weather_service.cache_status})
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from pydantic import BaseModel, model_validator
+from typing import List, Dict, Literal, Optional
 
 class WeatherResponse(BaseModel):
     name: str
@@ -35,4 +35,53 @@ class HourlyForecastEntry(BaseModel):
     snow: Optional[Dict[str, float]] = None
 
 class HourlyForecastResponse(BaseModel):
-    hourly_forecast: List[HourlyForecastEntry]
\ No newline at end of file
+    hourly_forecast: List[HourlyForecastEntry]
+
+class SummaryPeriod(BaseModel):
+    date: Optional[str] = None
+    start: int
+    end: int
+    hours: int
+    temp_min: Optional[float] = None
+    temp_max: Optional[float] = None
+    temp_mean: Optional[float] = None
+    feels_like_min: Optional[float] = None
+    feels_like_max: Optional[float] = None
+    pop_max: Optional[float] = None
+    uvi_max: Optional[float] = None
+    wind_speed_max: Optional[float] = None
+    wind_gust_max: Optional[float] = None
+    rain: float
+    snow: float
+    precipitation: float
+    best_hours: List[int]
+
+class ForecastSummaryResponse(BaseModel):
+    timezone_offset: int
+    window_hours: int
+    daily: List[SummaryPeriod]
+    windows: List[SummaryPeriod]
+
+class BatchLocation(BaseModel):
+    city: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+    @model_validator(mode="after")
+    def check_city_or_coordinates(self):
+        if self.city is None and (self.lat is None or self.lon is None):
+            raise ValueError("Each location needs either a city or both lat and lon")
+        return self
+
+class BatchRequest(BaseModel):
+    locations: List[BatchLocation]
+    units: Literal["metric", "imperial"] = "metric"
+
+class BatchItemResult(BaseModel):
+    query: BatchLocation
+    status: Literal["ok", "not_found", "rate_limited", "unavailable", "error"]
+    data: Optional[Dict] = None
+    detail: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
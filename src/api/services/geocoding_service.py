@@ -0,0 +1,107 @@
+from src.api.clients.openweathermap_client import OpenWeatherMapClient
+from src.api.clients.redis_client import RedisClient
+from src.api.core.config import settings
+from src.api.core.lru import LRUCache
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+def normalize_city_name(city: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", city)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+class GeocodingService:
+    def __init__(self, openweathermap_client: OpenWeatherMapClient, redis_client: RedisClient):
+        self.openweathermap_client = openweathermap_client
+        self.redis_client = redis_client
+        self.local_cache = LRUCache(settings.geocode_local_cache_size, settings.geocode_local_cache_ttl)
+
+    async def get_coordinates(self, city: str) -> Tuple[float, float]:
+        cache_key = f"city:{normalize_city_name(city)}"
+
+        
+        coordinates = self.local_cache.get(cache_key)
+        if coordinates is None:
+            coordinates = await self.redis_client.get_geocode(cache_key)
+            if coordinates is None:
+                coordinates = await self._resolve_city(city, cache_key)
+            self.local_cache.set(cache_key, coordinates, None if coordinates else settings.geocode_negative_ttl)
+
+        
+        if not coordinates:
+            raise ValueError("City not found")
+        return coordinates[0], coordinates[1]
+
+    async def get_coordinates_many(self, cities: List[str], concurrency: int) -> Dict[str, Optional[Tuple[float, float]]]:
+        cache_keys = {city: f"city:{normalize_city_name(city)}" for city in cities}
+        found = {}
+        missing = []
+        for city, cache_key in cache_keys.items():
+            coordinates = self.local_cache.get(cache_key)
+            if coordinates is None:
+                missing.append(city)
+            else:
+                found[city] = coordinates
+
+        
+        unresolved = []
+        for city, coordinates in zip(missing, await self.redis_client.get_geocode_many([cache_keys[city] for city in missing])):
+            if coordinates is None:
+                unresolved.append(city)
+            else:
+                found[city] = coordinates
+
+        
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def resolve(city: str):
+            async with semaphore:
+                try:
+                    return list(await self.openweathermap_client.get_coordinates(city))
+                except ValueError:
+                    return []
+
+        writes = {}
+        for city, result in zip(unresolved, await asyncio.gather(*(resolve(city) for city in unresolved), return_exceptions=True)):
+            if isinstance(result, BaseException):
+                logger.warning(f"Geocoding failed for {city}: {result}")
+                continue
+            found[city] = result
+            writes[cache_keys[city]] = (result, settings.geocode_ttl if result else settings.geocode_negative_ttl)
+        await self.redis_client.set_geocode_many(writes)
+
+        for city, coordinates in found.items():
+            self.local_cache.set(cache_keys[city], coordinates, None if coordinates else settings.geocode_negative_ttl)
+        return {city: (coordinates[0], coordinates[1]) if coordinates else None for city, coordinates in found.items()}
+
+    async def _resolve_city(self, city: str, cache_key: str):
+        try:
+            lat, lon = await self.openweathermap_client.get_coordinates(city)
+        except ValueError:
+            await self.redis_client.set_geocode(cache_key, [], settings.geocode_negative_ttl)
+            return []
+        coordinates = [lat, lon]
+        await self.redis_client.set_geocode(cache_key, coordinates, settings.geocode_ttl)
+        return coordinates
+
+    async def get_location_name(self, lat: float, lon: float) -> Optional[str]:
+        cache_key = f"reverse:{lat:.4f},{lon:.4f}"
+
+        name = self.local_cache.get(cache_key)
+        if name is None:
+            name = await self.redis_client.get_geocode(cache_key)
+            if name is None:
+                try:
+                    name = await self.openweathermap_client.get_location_name(lat, lon) or ""
+                except Exception as e:
+                    logger.warning(f"Reverse geocoding failed for {cache_key}: {e}")
+                    return None
+                ttl = settings.geocode_ttl if name else settings.geocode_negative_ttl
+                await self.redis_client.set_geocode(cache_key, name, ttl)
+            self.local_cache.set(cache_key, name, None if name else settings.geocode_negative_ttl)
+
+        return name or None
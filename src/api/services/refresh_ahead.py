@@ -0,0 +1,52 @@
+from src.api.clients.redis_client import RedisClient
+from src.api.core.config import settings
+from src.api.core.hotkeys import AccessTracker
+from src.api.services.weather_service import WeatherService
+from typing import List
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RefreshAheadScheduler:
+    def __init__(self, weather_service: WeatherService, redis_client: RedisClient, access_tracker: AccessTracker):
+        self.weather_service = weather_service
+        self.redis_client = redis_client
+        self.access_tracker = access_tracker
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.refresh_ahead_interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Refresh-ahead cycle failed: {e}")
+
+    async def run_once(self) -> List[str]:
+        await self.redis_client.increment_hot_keys(self.access_tracker.drain())
+
+        
+        if await self.redis_client.acquire_lock("lock:hotkeys:decay", settings.hot_key_half_life):
+            await self.redis_client.decay_hot_keys(0.5, settings.hot_key_min_score)
+
+        members = await self.redis_client.get_hot_keys(settings.refresh_ahead_top_k)
+        if not members:
+            return []
+        keys = [member.partition(":")[2] for member in members]
+        ttls = await self.redis_client.get_weather_ttls(keys)
+
+        
+        window_ms = (settings.refresh_ahead_window + settings.cache_stale_window) * 1000
+        due = [member for member, ttl_ms in zip(members, ttls) if ttl_ms == -2 or 0 <= ttl_ms < window_ms]
+        semaphore = asyncio.Semaphore(settings.refresh_ahead_concurrency)
+
+        async def refresh(member: str):
+            async with semaphore:
+                await self.weather_service.refresh_member(member)
+
+        await asyncio.gather(*(refresh(member) for member in due))
+        if due:
+            logger.info(f"Refreshed {len(due)} hot keys ahead of expiry")
+        return due
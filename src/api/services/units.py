@@ -0,0 +1,17 @@
+from src.api.core.forecast_columns import MPS_TO_MPH
+
+def celsius_to_fahrenheit(value: float) -> float:
+    return round(value * 1.8 + 32, 2)
+
+def mps_to_mph(value: float) -> float:
+    return round(value * MPS_TO_MPH, 2)
+
+def convert_weather(weather: dict, units: str) -> dict:
+    if units != "imperial":
+        return weather
+    main = dict(weather["main"])
+    main["temp"] = celsius_to_fahrenheit(main["temp"])
+    main["feels_like"] = celsius_to_fahrenheit(main["feels_like"])
+    wind = dict(weather["wind"])
+    wind["speed"] = mps_to_mph(wind["speed"])
+    return {**weather, "main": main, "wind": wind}
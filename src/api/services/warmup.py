@@ -0,0 +1,169 @@
+from src.api.clients.redis_client import RedisClient
+from src.api.core.config import settings
+from src.api.core.geo import quantize_location
+from src.api.core.metrics import timed
+from src.api.core.rate_limiter import upstream_priority, BACKGROUND
+from src.api.schemas.weather import BatchLocation
+from src.api.services.geocoding_service import GeocodingService
+from src.api.services.weather_service import WeatherService
+from typing import Iterable, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+def parse_target(spec: str) -> BatchLocation:
+    lat, _, lon = spec.partition(",")
+    try:
+        return BatchLocation(lat=float(lat), lon=float(lon))
+    except ValueError:
+        return BatchLocation(city=spec)
+
+def parse_targets(specs: Iterable[str]) -> List[BatchLocation]:
+    specs = (spec.strip() for spec in specs)
+    return [parse_target(spec) for spec in dict.fromkeys(spec for spec in specs if spec and not spec.startswith("#"))]
+
+def configured_targets(locations: str, path: str = "") -> List[BatchLocation]:
+    specs = locations.split(";")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            specs += f.read().splitlines()
+    return parse_targets(specs)
+
+def target_key(target: BatchLocation) -> str:
+    if target.city is not None:
+        return target.city
+    return quantize_location(target.lat, target.lon)[0]
+
+class CacheWarmer:
+    def __init__(self, weather_service: WeatherService, geocoding_service: GeocodingService, redis_client: RedisClient):
+        self.weather_service = weather_service
+        self.geocoding_service = geocoding_service
+        self.redis_client = redis_client
+        self.status = "pending"
+        self.ready = False
+        self.last_report: Optional[dict] = None
+
+    async def run(self, targets: List[BatchLocation]):
+        while True:
+            try:
+                await self.run_once(targets)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Cache warm-up failed: {e}")
+                self.status = "failed"
+            finally:
+                self.ready = True
+            if settings.warmup_interval <= 0:
+                return
+            await asyncio.sleep(settings.warmup_interval)
+
+    async def run_once(self, targets: List[BatchLocation]) -> dict:
+        self.status = "running"
+        started = time.perf_counter()
+        token = upstream_priority.set(BACKGROUND)
+        try:
+            report = await self._warm(targets, started)
+        finally:
+            upstream_priority.reset(token)
+        self.status = "ready"
+        self.last_report = report
+        logger.info(f"Cache warm-up finished: {report['warmed']} warmed, {report['skipped']} already fresh, {report['failed']} failed in {report['duration_s']}s")
+        return report
+
+    async def _warm(self, targets: List[BatchLocation], started: float) -> dict:
+        keyed = {target_key(target): target for target in targets}
+        ttls = await self.redis_client.get_weather_ttls(list(keyed)) if keyed else []
+        
+        fresh_ms = settings.cache_stale_window * 1000
+        due = {key: target for (key, target), ttl_ms in zip(keyed.items(), ttls) if ttl_ms == -2 or 0 <= ttl_ms < fresh_ms}
+        skipped = len(keyed) - len(due)
+        failed = {}
+        
+        cities = [target.city for target in due.values() if target.city is not None]
+        if cities:
+            with timed("geocode"):
+                coordinates = await self.geocoding_service.get_coordinates_many(cities, settings.warmup_concurrency)
+            for city in cities:
+                if coordinates.get(city) is None:
+                    failed[city] = "not_found" if city in coordinates else "geocode_failed"
+                    del due[city]
+        
+        semaphore = asyncio.Semaphore(settings.warmup_concurrency)
+
+        async def fetch(target: BatchLocation):
+            async with semaphore:
+                return await self.weather_service._fetch_location_upstream(target)
+
+        warmed = 0
+        pending = list(due.items())
+        batch_size = max(settings.warmup_batch_size, 1)
+        for offset in range(0, len(pending), batch_size):
+            chunk = pending[offset:offset + batch_size]
+            results = await asyncio.gather(*(fetch(target) for _, target in chunk), return_exceptions=True)
+        
+            weather_writes = {}
+            forecast_writes = {}
+            timezone_offsets = {}
+            for (key, target), result in zip(chunk, results):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Warm-up fetch failed for {key}: {result}")
+                    failed[key] = type(result).__name__
+                    continue
+                weather_writes[key], forecast_writes[key], timezone_offsets[key] = result
+                if target.city is None and settings.nearest_cell_radius_km > 0:
+                    await self.redis_client.index_location(key, target.lat, target.lon)
+            await self.redis_client.set_weather_and_forecast_many(weather_writes, forecast_writes, timezone_offsets)
+            warmed += len(weather_writes)
+            logger.info(f"Cache warm-up progress: {offset + len(chunk)}/{len(pending)} fetched in {time.perf_counter() - started:.2f}s")
+
+        return {
+            "total": len(targets),
+            "warmed": warmed,
+            "skipped": skipped,
+            "failed": len(failed),
+            "failures": failed,
+            "duration_s": round(time.perf_counter() - started, 3),
+        }
+
+async def warm(targets: List[BatchLocation]) -> dict:
+    from src.api.clients.openweathermap_client import OpenWeatherMapClient, create_http_client
+    from src.api.clients.redis_client import create_redis_pool, create_local_cache
+    from src.api.core.circuit_breaker import CircuitBreaker
+    from src.api.core.hotkeys import AccessTracker
+    from src.api.core.rate_limiter import UpstreamRateLimiter
+    from src.api.core.singleflight import RequestCoalescer
+
+    http_client = create_http_client()
+    redis_client = RedisClient(create_redis_pool(), create_local_cache())
+    try:
+        openweathermap_client = OpenWeatherMapClient(http_client, UpstreamRateLimiter(redis_client), CircuitBreaker())
+        geocoding_service = GeocodingService(openweathermap_client, redis_client)
+        weather_service = WeatherService(openweathermap_client, redis_client, geocoding_service, RequestCoalescer(redis_client), AccessTracker())
+        return await CacheWarmer(weather_service, geocoding_service, redis_client).run_once(targets)
+    finally:
+        await http_client.aclose()
+        await redis_client.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prefill the weather, forecast and geocode caches")
+    parser.add_argument("--locations", default=settings.warmup_locations, help="Semicolon-separated cities or lat,lon pairs")
+    parser.add_argument("--file", default=settings.warmup_file, help="File with one city or lat,lon pair per line")
+    parser.add_argument("--concurrency", type=int, default=settings.warmup_concurrency)
+    parser.add_argument("--batch-size", type=int, default=settings.warmup_batch_size)
+    args = parser.parse_args(argv)
+    settings.warmup_concurrency = args.concurrency
+    settings.warmup_batch_size = args.batch_size
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(warm(configured_targets(args.locations, args.file)))
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
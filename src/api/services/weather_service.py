@@ -1,155 +1,367 @@
 from src.api.clients.openweathermap_client import OpenWeatherMapClient
 from src.api.clients.redis_client import RedisClient
+from src.api.services.geocoding_service import GeocodingService
+from src.api.services.units import convert_weather
+from src.api.schemas.weather import BatchLocation
+from src.api.core.dependencies import get_openweathermap_client, get_redis_client, get_geocoding_service, get_request_coalescer, get_access_tracker
+from src.api.core.hotkeys import AccessTracker, city_member, location_member
+from src.api.core.rate_limiter import RateLimitExceeded, upstream_priority, BACKGROUND
+from src.api.core.errors import UpstreamUnavailable
+from src.api.core.singleflight import RequestCoalescer
+from src.api.core.geo import quantize_location, location_key_center
+from src.api.core.forecast_columns import columnar_from_hourly
+from src.api.core.forecast_summary import summarize_forecast
+from src.api.core.responses import CachedPayload, PreparedResponse, prepare_response, memoized_response
+from src.api.core.metrics import timed, track_background
+from src.api.core.config import settings
 from fastapi import Depends, BackgroundTasks
-from typing import Optional
+from typing import List, Optional
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+CANONICAL_UNITS = "metric"
+
 class WeatherService:
-    def __init__(self, openweathermap_client: OpenWeatherMapClient = Depends(), redis_client: RedisClient = Depends()):
+    def __init__(self, openweathermap_client: OpenWeatherMapClient = Depends(get_openweathermap_client), redis_client: RedisClient = Depends(get_redis_client), geocoding_service: GeocodingService = Depends(get_geocoding_service), request_coalescer: RequestCoalescer = Depends(get_request_coalescer), access_tracker: AccessTracker = Depends(get_access_tracker)):
         self.openweathermap_client = openweathermap_client
         self.redis_client = redis_client
+        self.geocoding_service = geocoding_service
+        self.request_coalescer = request_coalescer
+        self.access_tracker = access_tracker
+        self.cache_status = "miss"
 
     async def fetch_weather(self, city: str, units: str = "metric", background_tasks: Optional[BackgroundTasks] = None):
-        
-        cached_data = await self.redis_client.get_weather(city, units)
-        if cached_data:
-            
-            forecast_data = await self.redis_client.get_hourly_forecast(city, units)
-            if not forecast_data and not await self.redis_client.is_forecast_pending(city, units):
-                await self.redis_client.set_forecast_pending(city, units)
-                if background_tasks:
-                    background_tasks.add_task(self.refresh_forecast, city, units)
-            return cached_data
+        cached_entry, claimed_forecast = await self.redis_client.read_weather(city)
+        if cached_entry:
+            self.access_tracker.record(city_member(city))
+            self.cache_status = "stale" if cached_entry.stale else "fresh"
+            if (cached_entry.stale or claimed_forecast) and background_tasks:
+                background_tasks.add_task(self.refresh_forecast, city)
+            return self._weather_response(cached_entry.value, units)
 
         
+        current_weather = await self.request_coalescer.run(
+            f"weather:{city}",
+            lambda: self._fetch_weather_upstream(city, background_tasks),
+            lambda: self.redis_client.get_weather(city),
+        )
+        self.access_tracker.record(city_member(city))
+        return prepare_response(convert_weather(current_weather, units))
+
+    async def _fetch_weather_upstream(self, city: str, background_tasks: Optional[BackgroundTasks]):
         try:
-            full_weather_data = await self.openweathermap_client.get_current_weather(city, units)
+            with timed("geocode"):
+                lat, lon = await self.geocoding_service.get_coordinates(city)
+            full_weather_data = await self.openweathermap_client.get_onecall(lat, lon, CANONICAL_UNITS)
 
             
-            current_weather = {
-                "name": city,
-                "main": {
-                    "temp": full_weather_data["current"]["temp"],
-                    "feels_like": full_weather_data["current"]["feels_like"],
-                    "humidity": full_weather_data["current"]["humidity"]
-                },
-                "weather": full_weather_data["current"]["weather"],
-                "wind": {"speed": full_weather_data["current"]["wind_speed"]},
-                "pop": full_weather_data["hourly"][0]["pop"],
-                "uv_index": full_weather_data["current"]["uvi"]
-            }
+            current_weather = self._build_current_weather(city, full_weather_data)
             hourly_forecast = full_weather_data["hourly"]
+            timezone_offset = full_weather_data.get("timezone_offset", 0)
 
             
-            await self.redis_client.set_weather(city, current_weather, units)
+            await self.redis_client.set_weather(city, current_weather, forecast_pending=True)
 
             
-            await self.redis_client.set_forecast_pending(city, units)
             if background_tasks:
-                background_tasks.add_task(self.store_forecast, city, hourly_forecast, units)
+                background_tasks.add_task(self.store_forecast, city, hourly_forecast, timezone_offset)
 
             return current_weather
         except ValueError as e:
             logger.exception(f"ValueError: {e}")
             raise ValueError(str(e))
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             logger.exception(f"Exception: {e}")
             raise Exception(f"Error fetching weather data: {str(e)}")
 
+    async def resolve_location_key(self, lat: float, lon: float) -> str:
+        location_key, _, _ = quantize_location(lat, lon)
+        if settings.nearest_cell_radius_km > 0 and not await self.redis_client.get_weather(location_key):
+            nearby_key = await self.redis_client.find_fresh_nearby_location(lat, lon, settings.nearest_cell_radius_km, settings.nearest_cell_max_age)
+            if nearby_key:
+                return nearby_key
+        return location_key
+
     async def fetch_weather_by_coordinates(self, lat: float, lon: float, units: str = "metric", background_tasks: Optional[BackgroundTasks] = None):
         
-        location_key = f"{lat:.4f},{lon:.4f}"
-        
+        location_key = await self.resolve_location_key(lat, lon)
+        cell_lat, cell_lon = location_key_center(location_key)
         
-        cached_data = await self.redis_client.get_weather(location_key, units)
-        if cached_data:
-            
-            forecast_data = await self.redis_client.get_hourly_forecast(location_key, units)
-            if not forecast_data and not await self.redis_client.is_forecast_pending(location_key, units):
-                await self.redis_client.set_forecast_pending(location_key, units)
-                if background_tasks:
-                    background_tasks.add_task(self.refresh_forecast_by_coordinates, lat, lon, units)
-            return cached_data
+        cached_entry, claimed_forecast = await self.redis_client.read_weather(location_key)
+        if cached_entry:
+            self.access_tracker.record(location_member(location_key))
+            self.cache_status = "stale" if cached_entry.stale else "fresh"
+            if (cached_entry.stale or claimed_forecast) and background_tasks:
+                background_tasks.add_task(self.refresh_forecast_by_coordinates, cell_lat, cell_lon, location_key)
+            return self._weather_response(cached_entry.value, units)
 
         
+        current_weather = await self.request_coalescer.run(
+            f"weather:{location_key}",
+            lambda: self._fetch_weather_by_coordinates_upstream(cell_lat, cell_lon, location_key, background_tasks),
+            lambda: self.redis_client.get_weather(location_key),
+        )
+        self.access_tracker.record(location_member(location_key))
+        return prepare_response(convert_weather(current_weather, units))
+
+    async def _fetch_weather_by_coordinates_upstream(self, lat: float, lon: float, location_key: str, background_tasks: Optional[BackgroundTasks]):
         try:
-            full_weather_data = await self.openweathermap_client.get_weather_by_coordinates(lat, lon, units)
+            full_weather_data, location_name = await asyncio.gather(
+                self.openweathermap_client.get_onecall(lat, lon, CANONICAL_UNITS),
+                self.geocoding_service.get_location_name(lat, lon),
+            )
 
             
-            current_weather = {
-                "name": f"Location ({lat:.4f}, {lon:.4f})",
-                "main": {
-                    "temp": full_weather_data["current"]["temp"],
-                    "feels_like": full_weather_data["current"]["feels_like"],
-                    "humidity": full_weather_data["current"]["humidity"]
-                },
-                "weather": full_weather_data["current"]["weather"],
-                "wind": {"speed": full_weather_data["current"]["wind_speed"]},
-                "pop": full_weather_data["hourly"][0]["pop"],
-                "uv_index": full_weather_data["current"]["uvi"]
-            }
+            current_weather = self._build_current_weather(location_name or f"Location ({lat:.4f}, {lon:.4f})", full_weather_data)
             hourly_forecast = full_weather_data["hourly"]
-            
-            
-            if "name" in full_weather_data and full_weather_data["name"]:
-                current_weather["name"] = full_weather_data["name"]
+            timezone_offset = full_weather_data.get("timezone_offset", 0)
 
             
-            await self.redis_client.set_weather(location_key, current_weather, units)
+            await self.redis_client.set_weather(location_key, current_weather, forecast_pending=True)
+            if settings.nearest_cell_radius_km > 0:
+                await self.redis_client.index_location(location_key, lat, lon)
 
             
-            await self.redis_client.set_forecast_pending(location_key, units)
             if background_tasks:
-                background_tasks.add_task(self.store_forecast, location_key, hourly_forecast, units)
+                background_tasks.add_task(self.store_forecast, location_key, hourly_forecast, timezone_offset)
 
             return current_weather
         except ValueError as e:
             logger.exception(f"ValueError: {e}")
             raise ValueError(str(e))
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             logger.exception(f"Exception: {e}")
             raise Exception(f"Error fetching weather data: {str(e)}")
 
-    async def get_hourly_forecast(self, key: str, units: str = "metric"):
+    async def fetch_weather_batch(self, locations: List[BatchLocation], units: str = "metric", background_tasks: Optional[BackgroundTasks] = None) -> List[dict]:
+        return await self._fetch_batch(locations, units, forecast=False, background_tasks=background_tasks)
+
+    async def fetch_forecast_batch(self, locations: List[BatchLocation], units: str = "metric", background_tasks: Optional[BackgroundTasks] = None) -> List[dict]:
+        return await self._fetch_batch(locations, units, forecast=True, background_tasks=background_tasks)
+
+    async def _fetch_batch(self, locations: List[BatchLocation], units: str, forecast: bool, background_tasks: Optional[BackgroundTasks] = None) -> List[dict]:
+        keys = [location.city if location.city is not None else quantize_location(location.lat, location.lon)[0] for location in locations]
+        unique_keys = list(dict.fromkeys(keys))
+
+        
+        read_entries = self.redis_client.get_hourly_forecast_entries if forecast else self.redis_client.get_weather_entries
+        entries = dict(zip(unique_keys, await read_entries(unique_keys)))
+        cached = {}
+        for key, location in zip(keys, locations):
+            entry = entries[key]
+            if entry is None or key in cached:
+                continue
+            cached[key] = entry.value if forecast else entry.value.value
+            if entry.stale and background_tasks:
+                background_tasks.add_task(self.refresh_member, city_member(key) if location.city is not None else location_member(key))
+
         
-        return await self.redis_client.get_hourly_forecast(key, units)
+        misses = {key: location for key, location in zip(keys, locations) if key not in cached}
+        fetched_forecasts = {}
+        semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+        async def fetch_and_store(key: str, location: BatchLocation):
+            current_weather, hourly_forecast, timezone_offset = await self._fetch_location_upstream(location)
+            await self.redis_client.set_weather_and_forecast_many({key: current_weather}, {key: hourly_forecast}, {key: timezone_offset})
+            fetched_forecasts[key] = columnar_from_hourly(hourly_forecast, timezone_offset)
+            return current_weather
+
+        async def load_forecast(key: str, location: BatchLocation):
+            forecast_data = await self.redis_client.get_hourly_forecast(key)
+            if forecast_data is None:
+                await fetch_and_store(key, location)
+                forecast_data = fetched_forecasts[key]
+            return forecast_data
+
+        async def load(key: str, location: BatchLocation):
+            async with semaphore:
+                current_weather = await self.request_coalescer.run(f"weather:{key}", lambda: fetch_and_store(key, location), lambda: self.redis_client.get_weather(key))
+                if not forecast:
+                    return current_weather
+
+                if key in fetched_forecasts:
+                    return fetched_forecasts[key]
+
+                # a coalesced /weather miss stores its forecast in the background, so wait for its pending flag
+                deadline = time.monotonic() + settings.coalesce_wait_timeout
+                while time.monotonic() < deadline and await self.redis_client.is_forecast_pending(key):
+                    await asyncio.sleep(settings.coalesce_poll_interval)
+                return await self.request_coalescer.run(f"forecast:{key}", lambda: load_forecast(key, location), lambda: self.redis_client.get_hourly_forecast(key))
+
+        fetched = await asyncio.gather(*(load(key, location) for key, location in misses.items()), return_exceptions=True)
+
+        
+        errors = {}
+        for key, result in zip(misses, fetched):
+            if isinstance(result, BaseException):
+                errors[key] = result
+            else:
+                cached[key] = result
+
+        results = []
+        for key, location in zip(keys, locations):
+            error = errors.get(key)
+            if error is None:
+                data = cached[key].to_response(units) if forecast else convert_weather(cached[key], units)
+                results.append({"query": location, "status": "ok", "data": data})
+            elif isinstance(error, ValueError):
+                results.append({"query": location, "status": "not_found", "detail": str(error)})
+            elif isinstance(error, RateLimitExceeded):
+                results.append({"query": location, "status": "rate_limited", "detail": str(error)})
+            elif isinstance(error, UpstreamUnavailable):
+                results.append({"query": location, "status": "unavailable", "detail": str(error)})
+            else:
+                results.append({"query": location, "status": "error", "detail": f"Error fetching weather data: {str(error)}"})
+        return results
+
+    async def _fetch_location_upstream(self, location: BatchLocation):
+        if location.city is not None:
+            lat, lon = await self.geocoding_service.get_coordinates(location.city)
+            full_weather_data = await self.openweathermap_client.get_onecall(lat, lon, CANONICAL_UNITS)
+            name = location.city
+        else:
+            _, lat, lon = quantize_location(location.lat, location.lon)
+            full_weather_data, location_name = await asyncio.gather(
+                self.openweathermap_client.get_onecall(lat, lon, CANONICAL_UNITS),
+                self.geocoding_service.get_location_name(lat, lon),
+            )
+            name = location_name or f"Location ({lat:.4f}, {lon:.4f})"
+        return self._build_current_weather(name, full_weather_data), full_weather_data["hourly"], full_weather_data.get("timezone_offset", 0)
+
+    def _weather_response(self, payload: CachedPayload, units: str) -> PreparedResponse:
+        if units == CANONICAL_UNITS:
+            return payload.prepared
+        return memoized_response(payload.responses, units, lambda: convert_weather(payload.value, units))
+
+    def _build_current_weather(self, name: str, full_weather_data: dict) -> dict:
+        return {
+            "name": name,
+            "main": {
+                "temp": full_weather_data["current"]["temp"],
+                "feels_like": full_weather_data["current"]["feels_like"],
+                "humidity": full_weather_data["current"]["humidity"]
+            },
+            "weather": full_weather_data["current"]["weather"],
+            "wind": {"speed": full_weather_data["current"]["wind_speed"]},
+            "pop": full_weather_data["hourly"][0]["pop"],
+            "uv_index": full_weather_data["current"]["uvi"]
+        }
+
+    async def get_hourly_forecast(self, key: str, units: str = "metric", start: Optional[int] = None, end: Optional[int] = None, hours: Optional[int] = None, fields: Optional[List[str]] = None, member: Optional[str] = None, background_tasks: Optional[BackgroundTasks] = None):
+        unsliced = start is None and end is None and hours is None and fields is None
 
-    async def store_forecast(self, key: str, forecast: list, units: str = "metric"):
+        
+        forecast_entry, pending = None, False
+        if unsliced and units == CANONICAL_UNITS:
+            forecast_entry, pending = await self.redis_client.read_forecast_body(key)
+        if forecast_entry is None and not pending:
+            forecast_entry, pending = await self.redis_client.read_forecast(key)
+        if forecast_entry is None or pending:
+            return None, pending
+        self.cache_status = "stale" if forecast_entry.stale else "fresh"
+        if forecast_entry.stale and member and background_tasks:
+            background_tasks.add_task(self.refresh_member, member)
+
+        
+        if isinstance(forecast_entry.value, CachedPayload):
+            return forecast_entry.value.prepared, False
+        forecast_data = forecast_entry.value
+        if unsliced:
+            return memoized_response(forecast_data.responses, units, lambda: forecast_data.to_response(units)), False
+        return prepare_response(forecast_data.to_response(units, forecast_data.select(start, end, hours), fields)), False
+
+    async def get_forecast_summary(self, key: str, units: str = "metric", window: Optional[int] = None, member: Optional[str] = None, background_tasks: Optional[BackgroundTasks] = None):
+        window = window or settings.forecast_summary_window
+        
+        entry, pending = None, False
+        if window == settings.forecast_summary_window:
+            entry, pending = await self.redis_client.read_forecast_summary(key)
+        if entry is None and not pending:
+            entry, pending = await self.redis_client.read_forecast(key)
+        if entry is None or pending:
+            return None, pending
+        self.cache_status = "stale" if entry.stale else "fresh"
+        if entry.stale and member and background_tasks:
+            background_tasks.add_task(self.refresh_member, member)
+
+        
+        if isinstance(entry.value, CachedPayload):
+            payload = entry.value
+            return memoized_response(payload.responses, units, lambda: payload.value[units]), False
+        forecast_data = entry.value
+        if window == settings.forecast_summary_window:
+            return memoized_response(forecast_data.responses, ("summary", units), lambda: summarize_forecast(forecast_data, window, units)), False
+        return prepare_response(summarize_forecast(forecast_data, window, units)), False
+
+    @track_background
+    async def store_forecast(self, key: str, forecast: list, timezone_offset: int = 0):
         try:
             
-            formatted_forecast = {"hourly_forecast": forecast}
-            
-            
-            await self.redis_client.set_hourly_forecast(key, formatted_forecast, units)
-            
-            
-            await self.redis_client.redis.delete(f"forecast_pending:{key}:{units}")
+            with timed("store_forecast"):
+                await self.redis_client.set_hourly_forecast(key, forecast, timezone_offset)
         except Exception as e:
             logger.exception(f"Error in store_forecast: {e}")
-            
-            await self.redis_client.redis.delete(f"forecast_pending:{key}:{units}")
+            await self.redis_client.clear_forecast_pending(key)
+
+    async def refresh_member(self, member: str):
+        kind, _, key = member.partition(":")
+        if kind == "city":
+            await self.refresh_forecast(key)
+        else:
+            lat, lon = location_key_center(key)
+            await self.refresh_forecast_by_coordinates(lat, lon, key)
 
-    async def refresh_forecast(self, city: str, units: str = "metric"):
+    @track_background
+    async def refresh_forecast(self, city: str):
+        token = upstream_priority.set(BACKGROUND)
         try:
-            full_weather_data = await self.openweathermap_client.get_current_weather(city, units)
-            hourly_forecast = full_weather_data["hourly"]
-            await self.store_forecast(city, hourly_forecast, units)
+            await self.request_coalescer.run(f"refresh:{city}", lambda: self._refresh_forecast(city), wait=False)
+        finally:
+            upstream_priority.reset(token)
+
+    async def _refresh_forecast(self, city: str):
+        try:
+            current_weather, hourly_forecast, timezone_offset = await self._fetch_location_upstream(BatchLocation(city=city))
+            await self.redis_client.set_weather_and_forecast_many({city: current_weather}, {city: hourly_forecast}, {city: timezone_offset})
+        except ValueError as e:
+            logger.warning(f"Dropped hot key for {city}: {e}")
+            await self.redis_client.remove_hot_key(city_member(city))
+            await self.redis_client.clear_forecast_pending(city)
+        except UpstreamUnavailable as e:
+            logger.warning(f"Skipped forecast refresh for {city}: {e}")
+            await self.redis_client.clear_forecast_pending(city)
         except Exception as e:
             logger.exception(f"Error refreshing forecast: {e}")
+            await self.redis_client.clear_forecast_pending(city)
+
+    @track_background
+    async def refresh_forecast_by_coordinates(self, lat: float, lon: float, location_key: Optional[str] = None):
+        if location_key is None:
+            location_key, _, _ = quantize_location(lat, lon)
+        token = upstream_priority.set(BACKGROUND)
+        try:
+            await self.request_coalescer.run(f"refresh:{location_key}", lambda: self._refresh_forecast_by_coordinates(lat, lon, location_key), wait=False)
         finally:
-            
-            await self.redis_client.redis.delete(f"forecast_pending:{city}:{units}")
-            
-    async def refresh_forecast_by_coordinates(self, lat: float, lon: float, units: str = "metric"):
-        location_key = f"{lat:.4f},{lon:.4f}"
+            upstream_priority.reset(token)
+
+    async def _refresh_forecast_by_coordinates(self, lat: float, lon: float, location_key: str):
         try:
-            full_weather_data = await self.openweathermap_client.get_weather_by_coordinates(lat, lon, units)
-            hourly_forecast = full_weather_data["hourly"]
-            await self.store_forecast(location_key, hourly_forecast, units)
+            current_weather, hourly_forecast, timezone_offset = await self._fetch_location_upstream(BatchLocation(lat=lat, lon=lon))
+            await self.redis_client.set_weather_and_forecast_many({location_key: current_weather}, {location_key: hourly_forecast}, {location_key: timezone_offset})
+        except ValueError as e:
+            logger.warning(f"Dropped hot key for {location_key}: {e}")
+            await self.redis_client.remove_hot_key(location_member(location_key))
+            await self.redis_client.clear_forecast_pending(location_key)
+        except UpstreamUnavailable as e:
+            logger.warning(f"Skipped forecast refresh for {location_key}: {e}")
+            await self.redis_client.clear_forecast_pending(location_key)
         except Exception as e:
             logger.exception(f"Error refreshing forecast by coordinates: {e}")
-        finally:
-            
-            await self.redis_client.redis.delete(f"forecast_pending:{location_key}:{units}")
\ No newline at end of file
+            await self.redis_client.clear_forecast_pending(location_key)
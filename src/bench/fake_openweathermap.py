@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import random
+import zlib
+from collections import Counter
+from typing import Optional
+from fastapi import FastAPI, Response
+
+def make_onecall_payload(lat: float, lon: float, hours: int = 48, start: int = 1700000000):
+    hourly = [
+        {
+            "dt": start + i * 3600,
+            "temp": 10.0 + i * 0.5,
+            "feels_like": 8.0 + i * 0.5,
+            "pressure": 1012,
+            "humidity": 80,
+            "dew_point": 6.5,
+            "uvi": 0.2 * (i % 12),
+            "clouds": 75,
+            "visibility": 10000,
+            "wind_speed": 4.1,
+            "wind_deg": 250,
+            "wind_gust": 7.2,
+            "pop": 0.1 * (i % 10),
+            "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+        }
+        for i in range(hours)
+    ]
+    return {
+        "lat": lat,
+        "lon": lon,
+        "timezone": "UTC",
+        "timezone_offset": 0,
+        "current": {
+            "dt": start,
+            "temp": 10.0,
+            "feels_like": 8.0,
+            "humidity": 80,
+            "uvi": 0.5,
+            "wind_speed": 4.1,
+            "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+        },
+        "hourly": hourly,
+    }
+
+def city_coordinates(city: str):
+    digest = zlib.crc32(city.casefold().encode())
+    return round((digest % 12000) / 100 - 60, 4), round((digest // 12000 % 36000) / 100 - 180, 4)
+
+class FakeOpenWeatherMapServer:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, error_status: int = 500, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.app = self._build_app()
+
+    def reset(self):
+        self.calls.clear()
+
+    async def _respond(self, endpoint: str, build) -> Response:
+        self.calls[endpoint] += 1
+        delay = self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return Response(status_code=self.error_status, headers={"Retry-After": "1"})
+        return build()
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/geo/1.0/direct")
+        async def direct(q: str):
+            lat, lon = city_coordinates(q)
+            return await self._respond("geocode", lambda: [{"name": q, "lat": lat, "lon": lon}])
+
+        @app.get("/geo/1.0/reverse")
+        async def reverse(lat: float, lon: float):
+            return await self._respond("reverse_geocode", lambda: [{"name": f"Place {lat:.2f},{lon:.2f}"}])
+
+        @app.get("/data/3.0/onecall")
+        async def onecall(lat: float, lon: float):
+            return await self._respond("onecall", lambda: make_onecall_payload(lat, lon))
+
+        @app.get("/stats")
+        async def stats():
+            return dict(self.calls)
+
+        return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a fake OpenWeatherMap API for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    server = FakeOpenWeatherMapServer(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.seed)
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
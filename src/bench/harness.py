@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+from src.bench.fake_openweathermap import FakeOpenWeatherMapServer, city_coordinates
+
+@dataclass
+class TrafficMix:
+    cities: int = 300
+    hot_cities: int = 20
+    hot_fraction: float = 0.7
+    coord_fraction: float = 0.3
+    jitter_km: float = 1.0
+    imperial_fraction: float = 0.3
+    forecast_fraction: float = 0.2
+
+MIXES = {
+    "hot": TrafficMix(cities=50, hot_cities=5, hot_fraction=0.95, coord_fraction=0.2, jitter_km=0.5),
+    "cold": TrafficMix(cities=5000, hot_cities=0, hot_fraction=0.0, coord_fraction=0.3, jitter_km=5.0, forecast_fraction=0.1),
+    "mixed": TrafficMix(),
+}
+
+Request = Tuple[str, str, Dict[str, object]]
+Sample = Tuple[str, float, object, Optional[str]]
+
+def generate_requests(mix: TrafficMix, count: int, seed: int) -> List[Request]:
+    rng = random.Random(seed)
+    names = [f"Bench City {i:05d}" for i in range(mix.cities)]
+    hot = names[:mix.hot_cities]
+    cold = names[mix.hot_cities:] or names
+    jitter = mix.jitter_km / 111.0
+    requests = []
+    for _ in range(count):
+        city = rng.choice(hot) if hot and rng.random() < mix.hot_fraction else rng.choice(cold)
+        units = "imperial" if rng.random() < mix.imperial_fraction else "metric"
+        forecast = rng.random() < mix.forecast_fraction
+        if rng.random() < mix.coord_fraction:
+            lat, lon = city_coordinates(city)
+            params = {"lat": round(lat + rng.uniform(-jitter, jitter), 6), "lon": round(lon + rng.uniform(-jitter, jitter), 6), "units": units}
+            kind, path = ("forecast_coords", "/forecast-by-location") if forecast else ("weather_coords", "/weather-by-location")
+        else:
+            params = {"units": units}
+            kind, path = ("forecast_city", f"/forecast/{city}") if forecast else ("weather_city", f"/weather/{city}")
+        requests.append((kind, path, params))
+    return requests
+
+async def drive(client: httpx.AsyncClient, requests: List[Request], concurrency: int) -> List[Sample]:
+    samples: List[Sample] = []
+    pending = iter(requests)
+
+    async def worker():
+        for kind, path, params in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                status, cache_status = response.status_code, response.headers.get("x-cache-status")
+            except httpx.HTTPError:
+                status, cache_status = "error", None
+            samples.append((kind, time.perf_counter() - started, status, cache_status))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+def latency_summary(latencies: List[float]) -> dict:
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3), "mean": round(float(values.mean()), 3), "max": round(float(values.max()), 3)}
+
+def summarize(samples: List[Sample], elapsed: float, upstream_calls: Optional[Dict[str, int]]) -> dict:
+    by_kind = defaultdict(list)
+    for kind, latency, _, _ in samples:
+        by_kind[kind].append(latency)
+    statuses = Counter(str(status) for _, _, status, _ in samples)
+    cache = Counter(cache_status for _, _, _, cache_status in samples if cache_status)
+    cached = sum(cache.values())
+    report = {
+        "requests": len(samples),
+        "duration_s": round(elapsed, 3),
+        "requests_per_second": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": latency_summary([latency for _, latency, _, _ in samples]),
+        "by_kind": {kind: {"count": len(latencies), **latency_summary(latencies)} for kind, latencies in sorted(by_kind.items())},
+        "status_counts": dict(sorted(statuses.items())),
+        "cache": {
+            "hit_ratio": round((cache["fresh"] + cache["stale"]) / cached, 4) if cached else None,
+            "fresh": cache["fresh"],
+            "stale": cache["stale"],
+            "miss": cache["miss"],
+        },
+        "upstream_calls": None,
+    }
+    if upstream_calls is not None:
+        total = sum(upstream_calls.values())
+        report["upstream_calls"] = {"total": total, "per_request": round(total / len(samples), 4) if samples else None, "by_endpoint": dict(sorted(upstream_calls.items()))}
+    return report
+
+async def run_against(base_url: str, args, mix: TrafficMix, upstream_calls: Callable, reset_upstream: Callable) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        if args.warmup:
+            await drive(client, generate_requests(mix, args.warmup, args.seed + 1), args.concurrency)
+        await reset_upstream()
+        cache_before = (await client.get("/cache/stats")).json()
+
+        started = time.perf_counter()
+        samples = await drive(client, generate_requests(mix, args.requests, args.seed), args.concurrency)
+        elapsed = time.perf_counter() - started
+
+        cache_after = (await client.get("/cache/stats")).json()
+        report = summarize(samples, elapsed, await upstream_calls())
+        report["cache"]["server"] = {key: value - cache_before.get(key, 0) for key, value in cache_after.items() if key.endswith(("_hits", "_misses"))}
+        return report
+
+@asynccontextmanager
+async def serve(app):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+            raise RuntimeError("Benchmark server failed to start")
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+CONFIGURED_SETTINGS = ("openweathermap_base_url", "owm_rate_limit_per_minute", "owm_rate_limit_per_day", "refresh_ahead_enabled", "redis_host", "redis_port")
+
+def configure_app(main, settings, owm_url: str, args):
+    settings.openweathermap_base_url = owm_url
+    settings.owm_rate_limit_per_minute = args.rate_limit_per_minute
+    settings.owm_rate_limit_per_day = 0
+    settings.refresh_ahead_enabled = args.refresh_ahead
+    if args.redis:
+        host, _, port = args.redis.partition(":")
+        settings.redis_host, settings.redis_port = host, int(port or 6379)
+    else:
+        import fakeredis
+
+        server = fakeredis.FakeServer()
+        main.create_redis_pool = lambda: fakeredis.FakeAsyncRedis(server=server).connection_pool
+
+async def run_in_process(args, mix: TrafficMix) -> dict:
+    import src.api.main as main
+    from src.api.core.config import settings
+
+    fake = FakeOpenWeatherMapServer(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.seed)
+
+    async def upstream_calls():
+        return dict(fake.calls)
+
+    async def reset_upstream():
+        fake.reset()
+
+    saved_settings = {name: getattr(settings, name) for name in CONFIGURED_SETTINGS}
+    saved_pool_factory = main.create_redis_pool
+    try:
+        async with serve(fake.app) as owm_url:
+            configure_app(main, settings, owm_url, args)
+            async with serve(main.app) as app_url:
+                if args.redis and args.flush:
+                    await main.app.state.redis_client.redis.flushdb()
+                return await run_against(app_url, args, mix, upstream_calls, reset_upstream)
+    finally:
+        for name, value in saved_settings.items():
+            setattr(settings, name, value)
+        main.create_redis_pool = saved_pool_factory
+
+async def run_external(args, mix: TrafficMix) -> dict:
+    async with httpx.AsyncClient() as client:
+        async def upstream_calls():
+            if not args.upstream_stats:
+                return None
+            return (await client.get(args.upstream_stats)).json()
+
+        baseline = {}
+
+        async def reset_upstream():
+            baseline.update(await upstream_calls() or {})
+
+        async def upstream_delta():
+            current = await upstream_calls()
+            if current is None:
+                return None
+            return {endpoint: count - baseline.get(endpoint, 0) for endpoint, count in current.items()}
+
+        return await run_against(args.target, args, mix, upstream_delta, reset_upstream)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    rows = [
+        ("requests_per_second", report.get("requests_per_second"), baseline.get("requests_per_second")),
+        *((f"latency_ms.{p}", report["latency_ms"].get(p), baseline.get("latency_ms", {}).get(p)) for p in ("p50", "p95", "p99")),
+        ("cache.hit_ratio", report["cache"].get("hit_ratio"), baseline.get("cache", {}).get("hit_ratio")),
+        ("upstream_calls.per_request", (report.get("upstream_calls") or {}).get("per_request"), (baseline.get("upstream_calls") or {}).get("per_request")),
+    ]
+    lines = []
+    for name, current, previous in rows:
+        if current is None or previous is None:
+            continue
+        change = f"{(current - previous) / previous * 100:+.1f}%" if previous else "n/a"
+        lines.append(f"{name:<28} {previous:>12} -> {current:>12}  {change}")
+    return lines
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the weather API against a fake OpenWeatherMap")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    for name, value in asdict(TrafficMix()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=None, help=f"Override the mix's {name}")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake OpenWeatherMap response latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake OpenWeatherMap calls that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--rate-limit-per-minute", type=int, default=0, help="OWM_RATE_LIMIT_PER_MINUTE for the app under test (0 disables)")
+    parser.add_argument("--refresh-ahead", action="store_true")
+    parser.add_argument("--redis", default=None, help="HOST:PORT of a real Redis; an in-memory fake is used otherwise")
+    parser.add_argument("--flush", action="store_true", help="FLUSHDB the real Redis before running")
+    parser.add_argument("--target", default=None, help="Benchmark an already running app at this URL instead of starting one")
+    parser.add_argument("--upstream-stats", default=None, help="With --target, the /stats URL of a running fake OpenWeatherMap")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", default=None, help="Print changes against a previous JSON report")
+    return parser
+
+def resolve_mix(args) -> TrafficMix:
+    overrides = {name: getattr(args, name) for name in asdict(TrafficMix()) if getattr(args, name) is not None}
+    return TrafficMix(**{**asdict(MIXES[args.mix]), **overrides})
+
+async def run(args) -> dict:
+    mix = resolve_mix(args)
+    report = await (run_external(args, mix) if args.target else run_in_process(args, mix))
+    return {
+        "commit": git_commit(),
+        "timestamp": int(time.time()),
+        "python": sys.version.split()[0],
+        "config": {
+            "mix": args.mix,
+            "traffic": asdict(mix),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "upstream_latency_ms": args.latency_ms,
+            "upstream_error_rate": args.error_rate,
+            "redis": args.redis or "in-memory",
+            "target": args.target or "in-process",
+        },
+        **report,
+    }
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            for line in compare(report, json.load(f)):
+                print(line, file=sys.stderr)
@@ -1,17 +1,86 @@
+import asyncio
 import pytest
+import httpx
+import fakeredis
 from fastapi.testclient import TestClient
 from src.api.main import app
-from unittest.mock import AsyncMock
+from src.api.services.weather_service import WeatherService
+from src.bench.fake_openweathermap import make_onecall_payload
 
 @pytest.fixture
 def test_client():
     return TestClient(app)
 
+class FakeOpenWeatherMap:
+    def __init__(self):
+        self.calls = []
+        self.unknown_cities = {"invalidcity"}
+        self.latency = 0.0
+        self.fail = False
+
+    def count(self, path: str) -> int:
+        return sum(1 for call in self.calls if call == path)
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        params = request.url.params
+        self.calls.append(path)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            return httpx.Response(500)
+        if path == "/geo/1.0/direct":
+            if params["q"].lower() in self.unknown_cities:
+                return httpx.Response(200, json=[])
+            return httpx.Response(200, json=[{"name": params["q"], "lat": 51.5074, "lon": -0.1278}])
+        if path == "/geo/1.0/reverse":
+            return httpx.Response(200, json=[{"name": "Soho"}])
+        if path == "/data/3.0/onecall":
+            return httpx.Response(200, json=make_onecall_payload(float(params["lat"]), float(params["lon"])))
+        return httpx.Response(404)
+
+@pytest.fixture
+def fake_openweathermap():
+    return FakeOpenWeatherMap()
+
+@pytest.fixture
+def fake_redis_pool():
+    return fakeredis.FakeAsyncRedis().connection_pool
+
+@pytest.fixture
+def app_client(monkeypatch, fake_openweathermap, fake_redis_pool):
+    import src.api.main as main
+
+    monkeypatch.setattr(main, "create_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(fake_openweathermap.handler)))
+    monkeypatch.setattr(main, "create_redis_pool", lambda: fake_redis_pool)
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture
+def metric_value():
+    def value(text: str, name: str) -> float:
+        for line in text.splitlines():
+            if line.rsplit(" ", 1)[0] == name:
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    return value
+
+@pytest.fixture
+def make_stale(app_client):
+    redis_client = app_client.app.state.redis_client
+
+    async def expire(key: str):
+        await redis_client.redis.pexpire(f"weather:{key}", 10_000)
+        redis_client.local_cache.clear()
+
+    return lambda key: app_client.portal.call(expire, key)
+
+@pytest.fixture
+def weather_service(app_client):
+    state = app_client.app.state
+    return WeatherService(state.openweathermap_client, state.redis_client, state.geocoding_service, state.request_coalescer, state.access_tracker)
+
 @pytest.fixture
-async def mock_redis_client():
-    mock = AsyncMock()
-    mock.get_weather.return_value = None
-    mock.set_weather.return_value = None
-    mock.get_forecast.return_value = None
-    mock.set_forecast.return_value = None
-    return mock
+def onecall_payload():
+    return make_onecall_payload
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+from src.api.schemas.weather import BatchLocation
+
+def test_weather_batch_mixes_hits_misses_and_errors(app_client, fake_openweathermap):
+    app_client.get("/weather/London")
+    response = app_client.post("/weather/batch", json={
+        "units": "imperial",
+        "locations": [
+            {"city": "London"},
+            {"city": "Paris"},
+            {"lat": 51.5007, "lon": -0.1246},
+            {"city": "InvalidCity"},
+            {"city": "Paris"},
+        ],
+    })
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["ok", "ok", "ok", "not_found", "ok"]
+    assert results[0]["data"]["main"]["temp"] == 50.0
+    assert results[2]["data"]["name"] == "Soho"
+    assert fake_openweathermap.count("/data/3.0/onecall") == 3
+
+def test_forecast_batch_serves_forecasts_stored_by_weather_batch(app_client, fake_openweathermap):
+    app_client.post("/weather/batch", json={"locations": [{"city": "Berlin"}, {"city": "Rome"}]})
+    response = app_client.post("/forecast/batch", json={"locations": [{"city": "Berlin"}, {"city": "Rome"}]})
+    results = response.json()["results"]
+    assert all(result["status"] == "ok" for result in results)
+    assert len(results[0]["data"]["hourly_forecast"]) == 48
+    assert fake_openweathermap.count("/data/3.0/onecall") == 2
+
+def test_batch_rejects_locations_without_city_or_coordinates(app_client):
+    response = app_client.post("/weather/batch", json={"locations": [{"lat": 10.0}]})
+    assert response.status_code == 422
+
+def test_batch_miss_coalesces_with_single_request(app_client, fake_openweathermap, weather_service):
+    fake_openweathermap.latency = 0.2
+
+    async def concurrent():
+        return await asyncio.gather(
+            weather_service.fetch_forecast_batch([BatchLocation(city="Oslo")]),
+            weather_service.fetch_weather("Oslo"),
+        )
+
+    batch, _ = app_client.portal.call(concurrent)
+    assert batch[0]["status"] == "ok"
+    assert len(batch[0]["data"]["hourly_forecast"]) == 48
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
+
+def test_forecast_batch_waits_for_concurrent_weather_miss(monkeypatch, app_client, fake_openweathermap):
+    fake_openweathermap.latency = 0.2
+    redis_client = app_client.app.state.redis_client
+    set_hourly_forecast = redis_client.set_hourly_forecast
+
+    async def slow_set_hourly_forecast(*args):
+        await asyncio.sleep(0.2)
+        await set_hourly_forecast(*args)
+
+    monkeypatch.setattr(redis_client, "set_hourly_forecast", slow_set_hourly_forecast)
+    thread = threading.Thread(target=lambda: app_client.get("/weather/Oslo"))
+    thread.start()
+    time.sleep(0.05)
+
+    response = app_client.post("/forecast/batch", json={"locations": [{"city": "Oslo"}, {"city": "Oslo"}]})
+    thread.join()
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["ok", "ok"]
+    assert len(results[1]["data"]["hourly_forecast"]) == 48
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
+
+def test_stale_batch_hit_is_revalidated(app_client, fake_openweathermap, make_stale):
+    app_client.get("/weather/London")
+    make_stale("London")
+    response = app_client.post("/weather/batch", json={"locations": [{"city": "London"}]})
+    assert response.json()["results"][0]["status"] == "ok"
+    assert fake_openweathermap.count("/data/3.0/onecall") == 2
@@ -0,0 +1,19 @@
+import asyncio
+from src.bench.harness import MIXES, build_parser, generate_requests, run
+
+def test_traffic_generation_is_reproducible():
+    mix = MIXES["mixed"]
+    first = generate_requests(mix, 200, seed=7)
+    assert first == generate_requests(mix, 200, seed=7)
+    assert first != generate_requests(mix, 200, seed=8)
+    kinds = {kind for kind, _, _ in first}
+    assert kinds == {"weather_city", "weather_coords", "forecast_city", "forecast_coords"}
+
+def test_in_process_benchmark_reports_throughput_and_cache_stats():
+    args = build_parser().parse_args(["--mix", "hot", "--requests", "60", "--warmup", "10", "--concurrency", "4", "--latency-ms", "0", "--jitter-ms", "0"])
+    report = asyncio.run(run(args))
+    assert report["requests"] == 60
+    assert report["requests_per_second"] > 0
+    assert set(report["latency_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+    assert report["cache"]["hit_ratio"] > 0.5
+    assert report["upstream_calls"]["per_request"] < 1
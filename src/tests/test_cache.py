@@ -0,0 +1,163 @@
+import asyncio
+import fakeredis
+import pytest
+from src.api.clients.redis_client import RedisClient
+from src.api.core.lru import LRUCache
+from src.api.core.config import settings
+from src.api.core import compression
+from src.api.core.compression import UnsupportedCompression, compress_value, decompress_value, is_gzip
+
+def test_lru_cache_evicts_by_memory_budget():
+    cache = LRUCache(maxsize=10, max_bytes=100)
+    cache.set("a", 1, size=60)
+    cache.set("b", 2, size=60)
+    assert "a" not in cache
+    assert cache.get("b") == 2
+    assert cache.current_bytes == 60
+
+def test_lru_cache_resize_evicts_to_stay_in_budget():
+    cache = LRUCache(maxsize=10, max_bytes=100)
+    cache.set("a", 1, size=40)
+    cache.set("b", 2, size=40)
+    cache.resize("b", 80)
+    assert "a" not in cache
+    assert cache.current_bytes == 80
+
+def test_local_cache_charges_memoized_responses(app_client):
+    app_client.get("/weather/London")
+    redis_client = app_client.app.state.redis_client
+    redis_client.local_cache.clear()
+    app_client.get("/forecast/London", params={"units": "imperial"})
+    app_client.get("/forecast/London/summary", params={"units": "imperial", "window": 12})
+    app_client.get("/forecast/London", params={"units": "imperial"})
+
+    forecast, _ = redis_client.local_cache.get("forecast:London")
+    assert set(forecast.responses) == {"imperial"}
+    assert redis_client.local_cache.current_bytes >= forecast.size > len(forecast.responses["imperial"].body)
+
+def test_hot_key_is_served_from_local_cache(app_client):
+    app_client.get("/weather/London")
+    before = app_client.get("/cache/stats").json()
+    assert app_client.get("/weather/London").status_code == 200
+    after = app_client.get("/cache/stats").json()
+    assert after["l1_hits"] - before["l1_hits"] == 1
+    assert after["l2_hits"] == before["l2_hits"]
+    assert after["l2_misses"] == before["l2_misses"]
+
+def test_only_one_reader_claims_a_missing_forecast():
+    async def main():
+        client = RedisClient(fakeredis.FakeAsyncRedis().connection_pool)
+        await client.set_weather("london", {"temp": 10})
+        reads = await asyncio.gather(*(client.read_weather("london") for _ in range(5)))
+        await client.set_hourly_forecast("london", [])
+        return reads, await client.is_forecast_pending("london")
+
+    reads, pending_after_store = asyncio.run(main())
+    assert all(read.entry.value.value == {"temp": 10} for read in reads)
+    assert [read.claimed_forecast for read in reads].count(True) == 1
+    assert not pending_after_store
+
+def test_write_in_one_worker_invalidates_local_cache_in_another():
+    async def main():
+        server = fakeredis.FakeServer()
+        worker_a = RedisClient(fakeredis.FakeAsyncRedis(server=server).connection_pool, LRUCache(100, 60))
+        worker_b = RedisClient(fakeredis.FakeAsyncRedis(server=server).connection_pool, LRUCache(100, 60))
+        listener = asyncio.ensure_future(worker_a.listen_for_invalidations())
+        await asyncio.sleep(0.05)
+
+        await worker_b.set_weather("london", {"temp": 10})
+        assert await worker_a.get_weather("london") == {"temp": 10}
+        await worker_b.set_weather("london", {"temp": 12})
+        await asyncio.sleep(0.05)
+        result = await worker_a.get_weather("london")
+
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        return result
+
+    assert asyncio.run(main()) == {"temp": 12}
+
+def test_metric_and_imperial_share_one_upstream_fetch(app_client, fake_openweathermap):
+    metric = app_client.get("/weather/London").json()
+    imperial = app_client.get("/weather/London", params={"units": "imperial"}).json()
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
+    assert metric["main"]["temp"] == 10.0
+    assert imperial["main"]["temp"] == 50.0
+    assert imperial["wind"]["speed"] == 9.17
+
+    forecast = app_client.get("/forecast/London", params={"units": "imperial"}).json()
+    assert forecast["hourly_forecast"][0]["temp"] == 50.0
+    assert forecast["hourly_forecast"][0]["humidity"] == 80
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
+
+def test_cached_responses_carry_etag_and_honour_if_none_match(app_client):
+    first = app_client.get("/weather/London")
+    etag = first.headers["ETag"]
+    hit = app_client.get("/weather/London")
+    assert hit.headers["ETag"] == etag
+    assert hit.content == first.content
+
+    not_modified = app_client.get("/weather/London", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    imperial = app_client.get("/weather/London", params={"units": "imperial"}, headers={"If-None-Match": etag})
+    assert imperial.status_code == 200
+    assert imperial.headers["ETag"] != etag
+
+    forecast = app_client.get("/forecast/London")
+    assert app_client.get("/forecast/London", headers={"If-None-Match": forecast.headers["ETag"]}).status_code == 304
+
+def test_large_values_are_compressed_in_redis(app_client):
+    app_client.get("/weather/London")
+    redis_client = app_client.app.state.redis_client
+    stored = app_client.portal.call(redis_client.redis.get, "forecast:London")
+    assert is_gzip(stored)
+
+    redis_client.local_cache.clear()
+    assert len(app_client.get("/forecast/London").json()["hourly_forecast"]) == 48
+
+def test_forecast_is_served_precompressed(app_client):
+    app_client.get("/weather/London")
+    plain = app_client.get("/forecast/London", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    gzipped = app_client.get("/forecast/London", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in gzipped.headers["vary"]
+    assert gzipped.json() == plain.json()
+    assert app_client.get("/forecast/London", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]}).status_code == 304
+
+def test_forecast_body_is_stored_precompressed(app_client, metric_value):
+    app_client.get("/weather/London")
+    redis_client = app_client.app.state.redis_client
+    stored = app_client.portal.call(redis_client.redis.get, "forecast_body:London")
+    assert is_gzip(stored)
+
+    redis_client.local_cache.clear()
+    compress = 'weather_api_stage_seconds_count{stage="compress"}'
+    before = app_client.get("/metrics").text
+    response = app_client.get("/forecast/London", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["hourly_forecast"]) == 48
+    assert metric_value(app_client.get("/metrics").text, compress) == metric_value(before, compress)
+
+def test_zstd_cache_compression_round_trips(monkeypatch):
+    monkeypatch.setattr(settings, "cache_compression", "zstd")
+    data = b'{"temp": 12.5}' * 200
+    compressed = compress_value(data)
+    assert len(compressed) < len(data)
+    assert decompress_value(compressed) == data
+
+def test_zstd_value_without_zstandard_is_a_miss(monkeypatch, app_client, fake_openweathermap):
+    redis_client = app_client.app.state.redis_client
+    zstd_value = compression.ZSTD_MAGIC + b"\x00" * 16
+    app_client.portal.call(redis_client.redis.set, "weather:London", zstd_value)
+    monkeypatch.setattr(compression, "zstandard", None)
+    with pytest.raises(UnsupportedCompression):
+        decompress_value(zstd_value)
+
+    response = app_client.get("/weather/London")
+    assert response.status_code == 200
+    assert response.headers["X-Cache-Status"] == "miss"
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
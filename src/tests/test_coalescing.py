@@ -0,0 +1,50 @@
+import asyncio
+import fakeredis
+from src.api.clients.redis_client import RedisClient
+from src.api.core.singleflight import RequestCoalescer, SingleFlight
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"temp": 10}
+
+    async def main():
+        single_flight = SingleFlight()
+        return await asyncio.gather(*(single_flight.do("weather:london:metric", load) for _ in range(20)))
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert all(result == {"temp": 10} for result in results)
+
+def test_coalescer_follower_reads_leader_result_from_cache():
+    async def main():
+        redis_client = RedisClient(fakeredis.FakeAsyncRedis().connection_pool)
+        other_worker = RequestCoalescer(redis_client)
+        token = await redis_client.acquire_lock("lock:weather:london", 5)
+
+        async def leader_writes_cache():
+            await asyncio.sleep(0.1)
+            await redis_client.set_weather("london", {"name": "London"})
+            await redis_client.release_lock("lock:weather:london", token)
+
+        async def load():
+            raise AssertionError("follower must not call upstream")
+
+        writer = asyncio.ensure_future(leader_writes_cache())
+        result = await other_worker.run("weather:london", load, lambda: redis_client.get_weather("london"))
+        await writer
+        return result
+
+    assert asyncio.run(main()) == {"name": "London"}
+
+def test_concurrent_misses_hit_upstream_once(app_client, fake_openweathermap):
+    from concurrent.futures import ThreadPoolExecutor
+
+    fake_openweathermap.latency = 0.05
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: app_client.get("/weather/London"), range(8)))
+    assert all(response.status_code == 200 for response in responses)
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
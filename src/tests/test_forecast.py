@@ -0,0 +1,61 @@
+from src.api.core.forecast_columns import columnar_from_hourly, decode_hourly_forecast, encode_hourly_forecast
+from src.api.core.forecast_summary import summarize_forecast
+
+def test_columnar_round_trip_is_lossless(onecall_payload):
+    hourly = onecall_payload(51.5, -0.12, hours=3)["hourly"]
+    hourly[0]["temp"], hourly[0]["uvi"], hourly[0]["pop"] = -3.27, 0.6, 0.35
+    hourly[1]["rain"] = {"1h": 0.57}
+    hourly[1]["weather"] = [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}]
+    del hourly[2]["wind_gust"]
+
+    blob = encode_hourly_forecast(hourly)
+    entries = decode_hourly_forecast(blob).to_entries()
+    assert entries == hourly
+
+def test_forecast_time_range_and_field_projection(app_client):
+    app_client.get("/weather/London")
+    start = 1700000000 + 2 * 3600
+    response = app_client.get("/forecast/London", params={"from": start, "hours": 3, "fields": "temp,pop", "units": "imperial"})
+    assert response.status_code == 200
+    entries = response.json()["hourly_forecast"]
+    assert [entry["dt"] for entry in entries] == [start, start + 3600, start + 7200]
+    assert set(entries[0]) == {"dt", "temp", "pop"}
+    assert entries[0]["temp"] == 51.8
+
+    response = app_client.get("/forecast/London", params={"to": 1700000000 + 3600})
+    assert len(response.json()["hourly_forecast"]) == 2
+
+def test_forecast_rejects_unknown_fields(app_client):
+    app_client.get("/weather/London")
+    response = app_client.get("/forecast/London", params={"fields": "temp,colour"})
+    assert response.status_code == 400
+
+def test_summary_aggregates_by_local_day(onecall_payload):
+    hourly = onecall_payload(51.5, -0.12)["hourly"]
+    hourly[5]["rain"], hourly[7]["snow"] = {"1h": 1.25}, {"1h": 0.3}
+
+    summary = summarize_forecast(columnar_from_hourly(hourly, 5 * 3600), 6)
+    assert [(day["date"], day["hours"]) for day in summary["daily"]] == [("2023-11-15", 21), ("2023-11-16", 24), ("2023-11-17", 3)]
+    first = summary["daily"][0]
+    assert (first["temp_min"], first["temp_max"], first["temp_mean"]) == (10.0, 20.0, 15.0)
+    assert (first["rain"], first["snow"], first["precipitation"]) == (1.25, 0.3, 1.55)
+    assert len(first["best_hours"]) == 3
+    assert sum(window["hours"] for window in summary["windows"]) == 48
+
+def test_forecast_summary_endpoint_reads_stored_summary(app_client):
+    app_client.get("/weather/London")
+    redis_client = app_client.app.state.redis_client
+    assert app_client.portal.call(redis_client.redis.exists, "forecast_summary:London") == 1
+
+    response = app_client.get("/forecast/London/summary")
+    assert response.status_code == 200
+    assert response.json()["window_hours"] == 6
+    assert response.json()["daily"][0]["temp_max"] == 10.5
+
+    imperial = app_client.get("/forecast/London/summary", params={"units": "imperial", "window": 12}).json()
+    assert imperial["window_hours"] == 12
+    assert imperial["daily"][0]["temp_max"] == 50.9
+
+    app_client.get("/weather-by-location", params={"lat": 51.5, "lon": -0.12})
+    assert len(app_client.get("/forecast-by-location/summary", params={"lat": 51.5, "lon": -0.12}).json()["daily"]) == 3
+    assert app_client.get("/forecast/Nowhere/summary").status_code == 404
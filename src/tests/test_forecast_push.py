@@ -0,0 +1,59 @@
+import threading
+import time
+
+def request_in_background(fn):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(response=fn()))
+    thread.start()
+    return thread, result
+
+def mark_pending(app_client, key):
+    app_client.portal.call(app_client.app.state.redis_client.set_forecast_pending, key)
+
+def finish_pending(app_client, key):
+    time.sleep(0.2)
+    app_client.portal.call(app_client.app.state.redis_client.clear_forecast_pending, key)
+
+def test_pending_without_wait_returns_immediately(app_client):
+    app_client.get("/weather/London")
+    mark_pending(app_client, "London")
+    assert app_client.get("/forecast/London").json() == {"status": "pending", "retry_after": 30}
+
+def test_long_poll_returns_as_soon_as_forecast_is_stored(app_client):
+    app_client.get("/weather/London")
+    mark_pending(app_client, "London")
+
+    started = time.monotonic()
+    thread, result = request_in_background(lambda: app_client.get("/forecast/London", params={"wait": 10, "units": "imperial"}))
+    finish_pending(app_client, "London")
+    thread.join(5)
+
+    assert time.monotonic() - started < 5
+    assert "hourly_forecast" in result["response"].json()
+
+def test_summary_long_poll_with_custom_window(app_client):
+    app_client.get("/weather/London")
+    mark_pending(app_client, "London")
+
+    thread, result = request_in_background(lambda: app_client.get("/forecast/London/summary", params={"window": 12, "wait": 5}))
+    finish_pending(app_client, "London")
+    thread.join(5)
+
+    assert result["response"].json()["window_hours"] == 12
+
+def test_stream_emits_pending_then_forecast(app_client):
+    app_client.get("/weather/London")
+    mark_pending(app_client, "London")
+
+    def stream():
+        with app_client.stream("GET", "/forecast/London/stream", params={"hours": 2}) as response:
+            return response.headers["content-type"], response.read().decode()
+
+    thread, result = request_in_background(stream)
+    finish_pending(app_client, "London")
+    thread.join(5)
+
+    content_type, body = result["response"]
+    assert content_type.startswith("text/event-stream")
+    events = [line for line in body.splitlines() if line.startswith("event:")]
+    assert events == ["event: pending", "event: forecast"]
@@ -0,0 +1,55 @@
+import pytest
+from pydantic import ValidationError
+from src.api.core.config import Settings, settings
+from src.api.core.geo import decode_geohash, encode_geohash, haversine_km, location_key_center, quantize_location
+
+def test_geohash_round_trip():
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    lat, lon = decode_geohash("u4pruydqqvj")
+    assert haversine_km(lat, lon, 57.64911, 10.40744) < 0.001
+
+def test_grid_cell_center_maps_back_to_same_cell(monkeypatch):
+    monkeypatch.setattr(settings, "location_key_mode", "grid")
+    monkeypatch.setattr(settings, "location_grid_km", 2.0)
+    key, lat, lon = quantize_location(40.7128, -74.0060)
+    assert location_key_center(key) == (lat, lon)
+    assert quantize_location(lat, lon)[0] == key
+    assert haversine_km(lat, lon, 40.7128, -74.0060) < 2.0
+
+@pytest.mark.parametrize("mode, option, values", [
+    ("geohash", "geohash_precision", range(1, 13)),
+    ("grid", "location_grid_km", [0.25, 1.0, 2.0, 7.5, 50.0]),
+    ("exact", "geohash_precision", [6]),
+])
+def test_cell_center_round_trips_to_same_key(monkeypatch, mode, option, values):
+    monkeypatch.setattr(settings, "location_key_mode", mode)
+    points = [(40.7128, -74.0060), (51.50085, -0.12441), (-33.8688, 151.2093), (64.1466, -21.9426), (0.00004, 179.99996), (-89.99, -179.99)]
+    for value in values:
+        monkeypatch.setattr(settings, option, value)
+        for point in points:
+            key, lat, lon = quantize_location(*point)
+            assert location_key_center(key) == (lat, lon)
+            assert quantize_location(lat, lon)[0] == key
+
+@pytest.mark.parametrize("option, value", [
+    ("geohash_precision", 0),
+    ("geohash_precision", 13),
+    ("location_grid_km", 0),
+    ("location_grid_km", 0.1234567),
+])
+def test_location_key_settings_are_validated(option, value):
+    with pytest.raises(ValidationError):
+        Settings(**{option: value})
+
+def test_gps_jitter_shares_one_cache_entry(app_client, fake_openweathermap):
+    for lat, lon in [(51.50070, -0.12460), (51.50085, -0.12441), (51.50061, -0.12472)]:
+        assert app_client.get("/weather-by-location", params={"lat": lat, "lon": lon}).status_code == 200
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
+    assert app_client.get("/forecast-by-location", params={"lat": 51.50085, "lon": -0.12441}).status_code == 200
+
+def test_nearest_fresh_cell_is_served(app_client, fake_openweathermap, monkeypatch):
+    monkeypatch.setattr(settings, "nearest_cell_radius_km", 5.0)
+    app_client.get("/weather-by-location", params={"lat": 51.5007, "lon": -0.1246})
+    response = app_client.get("/weather-by-location", params={"lat": 51.5200, "lon": -0.1000})
+    assert response.status_code == 200
+    assert fake_openweathermap.count("/data/3.0/onecall") == 1
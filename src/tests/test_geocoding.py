@@ -0,0 +1,25 @@
+from src.api.services.geocoding_service import normalize_city_name
+
+def test_normalize_city_name_folds_case_whitespace_and_diacritics():
+    assert normalize_city_name("  São   Paulo ") == "sao paulo"
+    assert normalize_city_name("ZÜRICH") == "zurich"
+    assert normalize_city_name("München") == normalize_city_name("munchen")
+
+def test_city_coordinates_are_cached_across_spellings(app_client, fake_openweathermap):
+    assert app_client.get("/weather/Zürich").status_code == 200
+    assert app_client.get("/weather/zurich", params={"units": "imperial"}).status_code == 200
+    assert fake_openweathermap.count("/geo/1.0/direct") == 1
+
+def test_unknown_city_is_negatively_cached(app_client, fake_openweathermap):
+    for _ in range(2):
+        response = app_client.get("/weather/InvalidCity")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "City not found"
+    assert fake_openweathermap.count("/geo/1.0/direct") == 1
+
+def test_weather_by_location_uses_cached_reverse_geocode(app_client, fake_openweathermap):
+    response = app_client.get("/weather-by-location", params={"lat": 51.5, "lon": -0.12})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Soho"
+    app_client.get("/weather-by-location", params={"lat": 51.5, "lon": -0.12, "units": "imperial"})
+    assert fake_openweathermap.count("/geo/1.0/reverse") == 1
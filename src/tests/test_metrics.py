@@ -0,0 +1,25 @@
+from src.api.core.config import settings
+
+def test_metrics_expose_stage_cache_and_upstream_counters(app_client, metric_value):
+    before = app_client.get("/metrics").text
+    app_client.get("/weather/London")
+    app_client.get("/weather/London")
+    response = app_client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    hit = 'weather_api_cache_lookups_total{family="weather",result="hit"}'
+    assert metric_value(text, hit) == metric_value(before, hit) + 1
+    onecall = 'weather_api_upstream_responses_total{endpoint="onecall",status="200"}'
+    assert metric_value(text, onecall) == metric_value(before, onecall) + 1
+    assert 'weather_api_stage_seconds_count{stage="upstream_onecall"}' in text
+    assert 'weather_api_stage_seconds_count{stage="store_forecast"}' in text
+    assert "weather_api_background_tasks_in_flight 0.0" in text
+
+def test_server_timing_header_is_opt_in(app_client, monkeypatch):
+    assert "server-timing" not in app_client.get("/weather/London").headers
+
+    monkeypatch.setattr(settings, "server_timing_enabled", True)
+    header = app_client.get("/weather/Paris").headers["server-timing"]
+    stages = [part.split(";")[0] for part in header.split(", ")]
+    assert {"geocode", "upstream_onecall", "redis_write", "total"} <= set(stages)
@@ -0,0 +1,53 @@
+import asyncio
+import fakeredis
+import pytest
+from prometheus_client import REGISTRY
+from src.api.clients.redis_client import RedisClient
+from src.api.core.config import settings
+from src.api.core.rate_limiter import BACKGROUND, FOREGROUND, RateLimitExceeded, UpstreamRateLimiter
+
+@pytest.fixture
+def small_bucket(monkeypatch):
+    monkeypatch.setattr(settings, "owm_rate_limit_per_minute", 5)
+    monkeypatch.setattr(settings, "rate_limit_background_reserve", 0.4)
+    monkeypatch.setattr(settings, "rate_limit_foreground_max_wait", 0.0)
+    monkeypatch.setattr(settings, "rate_limit_background_max_wait", 0.0)
+
+def rejections(lane: str) -> float:
+    return REGISTRY.get_sample_value("weather_api_rate_limit_rejections_total", {"lane": lane}) or 0.0
+
+def test_background_lane_leaves_reserve_for_foreground(small_bucket):
+    before = {lane: rejections(lane) for lane in (BACKGROUND, FOREGROUND)}
+
+    async def main():
+        limiter = UpstreamRateLimiter(RedisClient(fakeredis.FakeAsyncRedis().connection_pool))
+        background = 0
+        for _ in range(5):
+            try:
+                await limiter.acquire(BACKGROUND)
+                background += 1
+            except RateLimitExceeded:
+                pass
+        foreground = 0
+        for _ in range(5):
+            try:
+                await limiter.acquire(FOREGROUND)
+                foreground += 1
+            except RateLimitExceeded:
+                pass
+        return background, foreground, limiter.stats
+
+    background, foreground, stats = asyncio.run(main())
+    assert (background, foreground) == (3, 2)
+    assert stats[BACKGROUND]["rejected"] == 2
+    assert stats[FOREGROUND]["rejected"] == 3
+    assert rejections(BACKGROUND) - before[BACKGROUND] == 2
+    assert rejections(FOREGROUND) - before[FOREGROUND] == 3
+
+def test_exhausted_quota_returns_503_with_retry_after(small_bucket, app_client):
+    statuses = [app_client.get(f"/weather/City{i}").status_code for i in range(4)]
+    assert statuses[:2] == [200, 200]
+    response = app_client.get("/weather/City9")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert app_client.get("/upstream/stats").json()["foreground"]["rejected"] >= 1
@@ -0,0 +1,50 @@
+import pytest
+from src.api.clients.redis_client import WEATHER_TTL
+from src.api.core.config import settings
+from src.api.services.refresh_ahead import RefreshAheadScheduler
+
+@pytest.fixture
+def scheduler(app_client, weather_service):
+    state = app_client.app.state
+    return RefreshAheadScheduler(weather_service, state.redis_client, state.access_tracker)
+
+def test_hot_key_is_refreshed_before_expiry(app_client, fake_openweathermap, scheduler):
+    for _ in range(3):
+        app_client.get("/weather/London")
+    app_client.get("/weather/Paris")
+    assert fake_openweathermap.count("/data/3.0/onecall") == 2
+
+    redis_client = app_client.app.state.redis_client
+
+    async def expire_soon_and_run():
+        await redis_client.redis.pexpire("weather:London", 30_000)
+        return await scheduler.run_once()
+
+    due = app_client.portal.call(expire_soon_and_run)
+    assert due == ["city:London"]
+    assert fake_openweathermap.count("/data/3.0/onecall") == 3
+
+    async def ttl():
+        return await redis_client.redis.ttl("weather:London")
+
+    assert app_client.portal.call(ttl) > WEATHER_TTL + settings.cache_stale_window - 5
+
+def test_hot_keys_are_ranked_by_access_count(app_client, scheduler):
+    for city, hits in [("Rome", 1), ("Oslo", 4), ("Lima", 2)]:
+        for _ in range(hits):
+            app_client.get(f"/weather/{city}")
+    app_client.portal.call(scheduler.run_once)
+    hot = app_client.portal.call(app_client.app.state.redis_client.get_hot_keys, 3)
+    assert hot[0] == "city:Oslo"
+
+def test_unknown_cities_do_not_become_hot_keys(app_client, fake_openweathermap, scheduler):
+    for _ in range(5):
+        assert app_client.get("/weather/InvalidCity").status_code == 404
+    app_client.get("/weather/London")
+    redis_client = app_client.app.state.redis_client
+    assert app_client.portal.call(scheduler.run_once) == []
+    assert app_client.portal.call(redis_client.get_hot_keys, 10) == ["city:London"]
+
+    app_client.portal.call(redis_client.increment_hot_keys, {"city:InvalidCity": 5})
+    assert app_client.portal.call(scheduler.run_once) == ["city:InvalidCity"]
+    assert app_client.portal.call(redis_client.get_hot_keys, 10) == ["city:London"]
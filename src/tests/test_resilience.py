@@ -0,0 +1,38 @@
+from src.api.core.config import settings
+
+def test_stale_entry_is_served_and_revalidated(app_client, fake_openweathermap, make_stale):
+    first = app_client.get("/weather/London")
+    assert first.headers["X-Cache-Status"] == "miss"
+    assert app_client.get("/weather/London").headers["X-Cache-Status"] == "fresh"
+
+    make_stale("London")
+    stale = app_client.get("/weather/London")
+    assert stale.status_code == 200
+    assert stale.headers["X-Cache-Status"] == "stale"
+    assert stale.json()["main"] == first.json()["main"]
+    assert fake_openweathermap.count("/data/3.0/onecall") == 2
+
+    redis_client = app_client.app.state.redis_client
+    ttl = app_client.portal.call(redis_client.redis.ttl, "weather:London")
+    assert ttl > settings.cache_stale_window
+
+def test_stale_entry_survives_upstream_outage(app_client, fake_openweathermap, make_stale):
+    app_client.get("/weather/London")
+    make_stale("London")
+    fake_openweathermap.fail = True
+
+    response = app_client.get("/weather/London")
+    assert response.status_code == 200
+    assert response.headers["X-Cache-Status"] == "stale"
+
+def test_circuit_opens_after_repeated_failures(app_client, fake_openweathermap):
+    fake_openweathermap.fail = True
+    for i in range(settings.circuit_failure_threshold):
+        assert app_client.get(f"/weather/City{i}").status_code == 500
+    calls = len(fake_openweathermap.calls)
+
+    response = app_client.get("/weather/Elsewhere")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert len(fake_openweathermap.calls) == calls
+    assert app_client.get("/upstream/stats").json()["circuit"]["state"] == "open"
@@ -0,0 +1,49 @@
+import pytest
+from src.api.core.config import settings
+from src.api.services.warmup import CacheWarmer, parse_targets
+
+@pytest.fixture
+def warmer(app_client, weather_service):
+    state = app_client.app.state
+    return CacheWarmer(weather_service, state.geocoding_service, state.redis_client)
+
+def test_parse_targets_accepts_cities_and_coordinates():
+    targets = parse_targets(["London", " 40.71,-74.01 ", "Paris,FR", "", "# comment", "London"])
+    assert [(target.city, target.lat, target.lon) for target in targets] == [
+        ("London", None, None),
+        (None, 40.71, -74.01),
+        ("Paris,FR", None, None),
+    ]
+
+def test_warmup_prefills_weather_forecast_and_geocode(app_client, fake_openweathermap, warmer):
+    targets = parse_targets(["London", "Paris", "InvalidCity", "40.71,-74.01"])
+
+    report = app_client.portal.call(warmer.run_once, targets)
+    assert report["warmed"] == 3
+    assert report["failures"] == {"InvalidCity": "not_found"}
+    assert warmer.status == "ready"
+    assert fake_openweathermap.count("/data/3.0/onecall") == 3
+
+    redis_client = app_client.app.state.redis_client
+    assert app_client.portal.call(redis_client.redis.exists, "geocode:city:paris", "geocode:city:invalidcity") == 2
+    fake_openweathermap.calls.clear()
+    assert app_client.get("/weather/London").headers["X-Cache-Status"] == "fresh"
+    assert app_client.get("/forecast/Paris").status_code == 200
+    assert app_client.get("/weather-by-location", params={"lat": 40.71, "lon": -74.01}).headers["X-Cache-Status"] == "fresh"
+    assert fake_openweathermap.count("/data/3.0/onecall") == 0
+
+    report = app_client.portal.call(warmer.run_once, targets)
+    assert report["skipped"] == 3
+    assert fake_openweathermap.count("/data/3.0/onecall") == 0
+
+def test_readiness_waits_for_warmup(monkeypatch, app_client, warmer):
+    assert app_client.get("/ready").status_code == 200
+
+    monkeypatch.setattr(app_client.app.state, "cache_warmer", warmer, raising=False)
+    assert app_client.get("/ready").status_code == 503
+
+    monkeypatch.setattr(settings, "warmup_interval", 0)
+    app_client.portal.call(warmer.run, parse_targets(["London"]))
+    response = app_client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["warmup"]["warmed"] == 1